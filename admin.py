@@ -1,52 +1,111 @@
-import logging
+import functools
 import re
 import sqlite3
+import sys
+import threading
 import time
-from datetime import datetime
 from contextlib import contextmanager
-from db import DB_FILE
-from utils import create_notification
+from app_logging import get_logger
+from db import pool, recompute_stats, refresh_resource_overview
+from db_cache import cached_query
+from utils import create_notification, write_lines
 
-# Configure logging
-logging.basicConfig(filename='system.log', level=logging.INFO, 
-                    format='%(asctime)s - %(levelname)s - %(message)s')
+logger = get_logger("admin")
+
+# SQL used by the admin actions, defined once so every call hands sqlite3 the
+# same text and hits the connection's prepared-statement cache
+SQL_PENDING_USERS = "SELECT username, full_name, user_type, join_date FROM users WHERE is_verified = 0"
+SQL_USER_EXISTS = "SELECT 1 FROM users WHERE username_lower = lower(?)"
+SQL_VERIFY_USER = "UPDATE users SET is_verified = 1 WHERE username_lower = lower(?) AND is_verified = 0"
+SQL_UNVERIFIED_USER = "SELECT username FROM users WHERE username_lower = lower(?) AND is_verified = 0"
+# Pages are ordered on sort_epoch, which is 0 for a NULL upload_epoch (a missing or malformed
+# upload_date), so those rows still compare in the keyset condition and reach the last page
+SQL_PENDING_RESOURCES = """SELECT id, title, uploaded_by, file_type, upload_date, category_name,
+                                  coalesce(upload_epoch, 0) AS sort_epoch
+                           FROM resources WHERE status = 'pending'
+                           ORDER BY sort_epoch DESC, id DESC LIMIT ?"""
+# Keyset continuation: rows strictly after the (sort_epoch, id) of the previous page's last row
+SQL_PENDING_RESOURCES_AFTER = """SELECT id, title, uploaded_by, file_type, upload_date, category_name,
+                                        coalesce(upload_epoch, 0) AS sort_epoch
+                                 FROM resources WHERE status = 'pending' AND (coalesce(upload_epoch, 0), id) < (?, ?)
+                                 ORDER BY sort_epoch DESC, id DESC LIMIT ?"""
+SQL_SET_PENDING_STATUS = "UPDATE resources SET status = ? WHERE status = 'pending' AND id IN ({ids})"
+SQL_RESOURCE_STATUSES = "SELECT id, status FROM resources WHERE id IN ({ids})"
+SQL_LIST_CATEGORIES = """SELECT id, name, description, color, is_active, created_date 
+                         FROM categories ORDER BY is_active DESC, name ASC LIMIT ? OFFSET ?"""
+SQL_CATEGORY_BY_NAME = "SELECT id FROM categories WHERE name_lower = lower(?)"
+SQL_INSERT_CATEGORY = """INSERT INTO categories (name, description, color, created_by, created_date, is_active) 
+                         VALUES (?, ?, ?, ?, datetime('now', 'localtime'), 1)"""
+SQL_CATEGORY_DETAILS = "SELECT name, description, color FROM categories WHERE id = ?"
+SQL_UPDATE_CATEGORY = "UPDATE categories SET name = ?, description = ?, color = ? WHERE id = ?"
+SQL_RENAME_CATEGORY_RESOURCES = "UPDATE resources SET category_name = ? WHERE category_name = ?"
+SQL_CATEGORY_NAME = "SELECT name FROM categories WHERE id = ?"
+SQL_DASHBOARD_STATS = """SELECT key, value FROM stats WHERE key IN (
+                             'users_total', 'users_verified', 'users_pending',
+                             'resources_total', 'resources_approved', 'resources_pending', 'resources_rejected',
+                             'categories_total', 'categories_active', 'categories_inactive')"""
+SQL_SET_CATEGORY_ACTIVE = "UPDATE categories SET is_active = ? WHERE id = ? AND is_active = ?"
+SQL_CATEGORY_NAME_IF_ACTIVE = "SELECT name FROM categories WHERE id = ? AND is_active = ?"
+
+# Upper bound on IDs accepted in one batch approve/reject
+MAX_BATCH_IDS = 500
+
+# Rows shown per page in the pending-resource and category listings
+PAGE_SIZE = 40
+
+# UPDATE ... RETURNING needs SQLite 3.35+; older builds check with a SELECT first
+HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+_HEX_COLOR_RE = re.compile(r'^#[0-9A-Fa-f]{6}$')
 
 @contextmanager
-def get_db_connection(timeout=30.0, retries=5):
-    """Context manager for database connections with retry logic and extended timeout."""
-    conn = None
-    for attempt in range(retries):
-        try:
-            conn = sqlite3.connect(DB_FILE, timeout=timeout)
-            # Set pragmas for better concurrency
-            conn.execute("PRAGMA journal_mode=WAL;")
-            conn.execute("PRAGMA synchronous=NORMAL;")
-            conn.execute("PRAGMA busy_timeout=30000;")  # 30 second busy timeout
-            yield conn
-            return
-        except sqlite3.OperationalError as e:
-            if "database is locked" in str(e).lower() and attempt < retries - 1:
-                wait_time = (attempt + 1) * 2  # Progressive backoff: 2, 4, 6, 8 seconds
-                print(f"⚠️  Database locked, retrying in {wait_time} seconds... (attempt {attempt + 1}/{retries})")
-                if conn:
+def get_db_connection(write=False, timeout=30.0):
+    """Context manager that checks out a pooled connection.
+
+    Mutating actions get the single writer connection; read-only actions get a reader.
+    Lock contention is absorbed by SQLite's busy_timeout rather than a Python retry loop.
+    """
+    conn = pool.get(write=write, timeout=timeout)
+    assert conn.is_read_only != write, "pool returned the wrong kind of connection"
+    try:
+        yield conn
+    finally:
+        pool.put(conn)
+
+def admin_action(fn=None, *, connection=None):
+    """Decorator giving an admin action the shared error handling.
+
+    With connection="read" or "write" the action receives a pooled connection as
+    its first argument; write actions run inside BEGIN IMMEDIATE, committed on
+    return and rolled back on error. Actions that prompt between reading and
+    writing take no connection and check out their own, so the writer is never
+    held while waiting for input.
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            try:
+                if connection is None:
+                    return fn(*args, **kwargs)
+                with get_db_connection(write=connection == "write") as conn:
+                    if connection != "write":
+                        return fn(conn, *args, **kwargs)
+                    conn.execute("BEGIN IMMEDIATE")
                     try:
-                        conn.close()
-                    except:
-                        pass
-                time.sleep(wait_time)
-                continue
-            else:
-                print(f"❌ Database error after {retries} attempts: {e}")
-                raise e
-        except Exception as e:
-            print(f"❌ Unexpected database error: {e}")
-            raise e
-        finally:
-            if conn:
-                try:
-                    conn.close()
-                except:
-                    pass
+                        result = fn(conn, *args, **kwargs)
+                    except BaseException:
+                        conn.rollback()
+                        raise
+                    conn.commit()
+                    return result
+            except sqlite3.Error as e:
+                print(f"❌ Database error: {e}")
+                logger.error(f"Database error in {fn.__name__}: {e}")
+            except Exception as e:
+                print(f"❌ Unexpected error: {e}")
+                logger.error(f"Unexpected error in {fn.__name__}: {e}")
+        return wrapper
+    return decorate(fn) if fn is not None else decorate
 
 def safe_input(prompt, default=""):
     """Safe input function with error handling."""
@@ -59,219 +118,327 @@ def safe_input(prompt, default=""):
         print(f"❌ Input error: {e}")
         return default
 
-def verify_user():
-    """Verify pending user accounts with enhanced error handling."""
-    try:
+def _format_pending_users(pending):
+    """Yield the verify_user listing one user block at a time."""
+    for i, user in enumerate(pending, 1):
+        yield (f"\n{i}. 👤 Username: {user['username']}\n"
+               f"   📝 Full Name: {user['full_name'] or 'Not provided'}\n"
+               f"   🏷️  User Type: {user['user_type'] or 'student'}\n"
+               f"   📅 Join Date: {user['join_date'] or 'Unknown'}\n"
+               f"{'-' * 50}\n")
+
+def _format_resource_details(pending):
+    """Yield the approve_resource listing one resource block at a time."""
+    for resource in pending:
+        yield (f"\n🆔 ID: {resource['id']}\n"
+               f"   📄 Title: {resource['title']}\n"
+               f"   👤 Uploaded by: {resource['uploaded_by']}\n"
+               f"   📁 Type: {resource['file_type']}\n"
+               f"   🏷️  Category: {resource['category_name'] or 'Uncategorized'}\n"
+               f"   📅 Upload Date: {resource['upload_date']}\n"
+               f"{'-' * 70}\n")
+
+def _format_resource_rows(pending):
+    """Yield the reject_resource listing one line per resource."""
+    for resource in pending:
+        yield (f"🆔 {resource['id']} | 📄 {resource['title']} | 👤 {resource['uploaded_by']} | "
+               f"📁 {resource['file_type']} | 🏷️  {resource['category_name'] or 'Uncategorized'}\n")
+    yield "-" * 80 + "\n"
+
+def _format_categories(categories):
+    """Yield the category listing one category block at a time."""
+    for cat in categories:
+        status = "🟢 Active" if cat['is_active'] else "🔴 Inactive"
+        yield (f"\n🆔 ID: {cat['id']} | 📝 Name: {cat['name']}\n"
+               f"   📄 Description: {cat['description'] or 'No description'}\n"
+               f"   🎨 Color: {cat['color']} | {status}\n"
+               f"   📅 Created: {cat['created_date']}\n"
+               f"{'-' * 70}\n")
+
+class _PendingCache:
+    """Pending-resources listing shared by approve_resource and reject_resource."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timestamp = 0.0
+        self.rows = None
+        self.rows_generation = -1
+        self.generation = 0
+
+_pending_cache = _PendingCache()
+
+def invalidate_pending_resources():
+    """Discard the cached pending listing after a status change or a new upload."""
+    with _pending_cache.lock:
+        _pending_cache.generation += 1
+
+def _get_pending_resources(conn, after=None, max_age=5.0):
+    """Return one page of pending resources, newest first.
+
+    after is the (sort_epoch, id) of the previous page's last row. Only the first
+    page is cached, reusing a listing fetched within the last max_age seconds.
+    """
+    if after is not None:
+        return conn.execute(SQL_PENDING_RESOURCES_AFTER, (*after, PAGE_SIZE)).fetchall()
+
+    with _pending_cache.lock:
+        if (_pending_cache.rows is not None
+                and _pending_cache.rows_generation == _pending_cache.generation
+                and time.monotonic() - _pending_cache.timestamp < max_age):
+            return _pending_cache.rows
+        generation = _pending_cache.generation
+
+    rows = conn.execute(SQL_PENDING_RESOURCES, (PAGE_SIZE,)).fetchall()
+
+    with _pending_cache.lock:
+        _pending_cache.rows = rows
+        _pending_cache.rows_generation = generation
+        _pending_cache.timestamp = time.monotonic()
+    return rows
+
+def _browse_pending_resources(page, formatter, action):
+    """Show pending resources a page at a time and return the admin's reply."""
+    show = True
+    while True:
+        if show:
+            write_lines(formatter(page))
+        has_more = len(page) == PAGE_SIZE
+        hint = ", 'n' for the next page" if has_more else ""
+        reply = safe_input(f"\n➤ Enter resource ID(s) to {action}, e.g. 12,15,17-23{hint} (or 'back' to return): ")
+        if not has_more or reply.lower() != 'n':
+            return reply
+
         with get_db_connection() as conn:
-            c = conn.cursor()
-            
-            # Get pending users
-            c.execute("SELECT username, full_name, user_type, join_date FROM users WHERE is_verified = 0")
-            pending = c.fetchall()
-            
-            if not pending:
-                print("✅ No pending users to verify!")
-                logging.info("No pending users for verification")
-                return
-            
-            print("\n" + "="*60)
-            print("🔍 PENDING USERS FOR VERIFICATION")
-            print("="*60)
-            
-            for i, user in enumerate(pending, 1):
-                print(f"\n{i}. 👤 Username: {user[0]}")
-                full_name = user[1] if user[1] else "Not provided"
-                print(f"   📝 Full Name: {full_name}")
-                user_type = user[2] if user[2] else "student"
-                print(f"   🏷️  User Type: {user_type}")
-                join_date = user[3] if user[3] else "Unknown"
-                print(f"   📅 Join Date: {join_date}")
-                print("-" * 50)
-            
-            username = safe_input("\n➤ Enter username to verify (or 'back' to return): ")
-            
-            if username.lower() == 'back' or not username:
-                if not username:
-                    print("⚠️  Username cannot be empty!")
-                    logging.warning("Empty username input for verification")
-                return
-            
-            # Check if user exists and is not verified
-            c.execute("SELECT is_verified, username FROM users WHERE username = ? COLLATE NOCASE", (username,))
-            result = c.fetchone()
+            next_page = _get_pending_resources(conn, after=(page[-1]['sort_epoch'], page[-1]['id']))
+        if next_page:
+            page, show = next_page, True
+        else:
+            print("📭 No more pending resources.")
+            page, show = page[:0], False
+
+def parse_id_ranges(text):
+    """Parse input like '12,15,17-23,30' into a set of IDs.
+
+    Raises ValueError for malformed parts or batches larger than MAX_BATCH_IDS.
+    """
+    ids = set()
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        low, sep, high = part.partition("-")
+        low, high = low.strip(), high.strip()
+        if sep:
+            if not (low.isdigit() and high.isdigit()) or int(low) > int(high):
+                raise ValueError(f"Invalid ID range '{part}'")
+            if int(high) - int(low) >= MAX_BATCH_IDS:
+                raise ValueError(f"Range '{part}' exceeds {MAX_BATCH_IDS} IDs")
+            ids.update(range(int(low), int(high) + 1))
+        elif part.isdigit():
+            ids.add(int(part))
+        else:
+            raise ValueError(f"Invalid ID '{part}'")
+        if len(ids) > MAX_BATCH_IDS:
+            raise ValueError(f"At most {MAX_BATCH_IDS} IDs can be processed at once")
+    if not ids:
+        raise ValueError("No IDs given")
+    return ids
+
+def _update_pending_resources(conn, resource_ids, new_status):
+    """Move every pending resource in the batch to new_status within one transaction.
+
+    Returns (updated_ids, missing_ids, not_pending) where not_pending maps ID -> status.
+    """
+    ordered = sorted(resource_ids)
+    conn.execute("BEGIN IMMEDIATE")
+    if HAS_RETURNING:
+        # The UPDATE reports what it changed; statuses are only looked up for the rest
+        sql = SQL_SET_PENDING_STATUS.format(ids=",".join("?" * len(ordered))) + " RETURNING id"
+        updated = sorted(row['id'] for row in conn.execute(sql, (new_status, *ordered)).fetchall())
+        done = set(updated)
+        rest = [rid for rid in ordered if rid not in done]
+        statuses = {}
+        if rest:
+            statuses = dict(conn.execute(
+                SQL_RESOURCE_STATUSES.format(ids=",".join("?" * len(rest))), rest).fetchall())
+    else:
+        statuses = dict(conn.execute(
+            SQL_RESOURCE_STATUSES.format(ids=",".join("?" * len(ordered))), ordered).fetchall())
+        updated = [rid for rid in ordered if statuses.get(rid) == "pending"]
+        if updated:
+            conn.execute(SQL_SET_PENDING_STATUS.format(ids=",".join("?" * len(updated))),
+                         (new_status, *updated))
+    conn.commit()
+
+    missing = [rid for rid in ordered if rid not in statuses and rid not in set(updated)]
+    not_pending = {rid: status for rid, status in statuses.items() if status != "pending"}
+    if updated:
+        invalidate_pending_resources()
+    return updated, missing, not_pending
+
+def _verify_username(conn, username):
+    """Mark an unverified user as verified; return the stored username or None."""
+    if HAS_RETURNING:
+        # Check and update in one atomic statement
+        rows = conn.execute(SQL_VERIFY_USER + " RETURNING username", (username,)).fetchall()
+        return rows[0]['username'] if rows else None
+
+    conn.execute("BEGIN IMMEDIATE")
+    row = conn.execute(SQL_UNVERIFIED_USER, (username,)).fetchone()
+    if row:
+        conn.execute(SQL_VERIFY_USER, (username,))
+    conn.commit()
+    return row['username'] if row else None
+
+def _set_category_active(conn, cat_id, active):
+    """Flip a category's is_active flag; return its name, or None if nothing changed."""
+    params = (int(active), cat_id, int(not active))
+    if HAS_RETURNING:
+        rows = conn.execute(SQL_SET_CATEGORY_ACTIVE + " RETURNING name", params).fetchall()
+        return rows[0]['name'] if rows else None
+
+    conn.execute("BEGIN IMMEDIATE")
+    row = conn.execute(SQL_CATEGORY_NAME_IF_ACTIVE, (cat_id, int(not active))).fetchone()
+    if row:
+        conn.execute(SQL_SET_CATEGORY_ACTIVE, params)
+    conn.commit()
+    return row['name'] if row else None
+
+@admin_action
+def verify_user():
+    """Verify pending user accounts."""
+    # Listing runs on a read-only connection
+    with get_db_connection() as conn:
+        pending = conn.execute(SQL_PENDING_USERS).fetchall()
+    
+    if not pending:
+        print("✅ No pending users to verify!")
+        logger.debug("No pending users for verification")
+        return
+    
+    print("\n" + "="*60)
+    print("🔍 PENDING USERS FOR VERIFICATION")
+    print("="*60)
+    
+    write_lines(_format_pending_users(pending))
+    
+    username = safe_input("\n➤ Enter username to verify (or 'back' to return): ")
+    
+    if username.lower() == 'back' or not username:
+        if not username:
+            print("⚠️  Username cannot be empty!")
+            logger.warning("Empty username input for verification")
+        return
+    
+    with get_db_connection(write=True) as conn:
+        verified = _verify_username(conn, username)
+        
+        if not verified:
+            # Only the failure path needs to know why nothing was updated
+            result = conn.execute(SQL_USER_EXISTS, (username,)).fetchone()
             
             if not result:
                 print(f"❌ User '{username}' not found!")
-                logging.warning(f"User '{username}' not found for verification")
-                return
-                
-            if result[0]:  # Already verified
-                print(f"⚠️  User '{username}' is already verified!")
-                logging.warning(f"User '{username}' already verified")
+                logger.warning(f"User '{username}' not found for verification")
                 return
             
-            # Verify the user
-            c.execute("UPDATE users SET is_verified = 1 WHERE username = ? COLLATE NOCASE", (username,))
-            
-            # Create notification
-            
-            
-            conn.commit()
-            print(f"✅ User '{username}' verified successfully!")
-            logging.info(f"User '{username}' verified successfully")
-                
-    except sqlite3.Error as e:
-        print(f"❌ Database error: {e}")
-        logging.error(f"Database error in verify_user: {e}")
-    except Exception as e:
-        print(f"❌ Unexpected error: {e}")
-        logging.error(f"Unexpected error in verify_user: {e}")
+            print(f"⚠️  User '{username}' is already verified!")
+            logger.warning(f"User '{username}' already verified")
+            return
+        
+        print(f"✅ User '{username}' verified successfully!")
+        logger.info(f"User '{username}' verified successfully")
 
+@admin_action
 def approve_resource():
-    """Approve pending resources with enhanced error handling."""
+    """Approve pending resources."""
+    # Listing runs on a read-only connection
+    with get_db_connection() as conn:
+        pending = _get_pending_resources(conn)
+    
+    if not pending:
+        print("✅ No pending resources to approve!")
+        logger.debug("No pending resources for approval")
+        return
+    
+    print("\n" + "="*80)
+    print("📋 PENDING RESOURCES FOR APPROVAL")
+    print("="*80)
+    
+    resource_input = _browse_pending_resources(pending, _format_resource_details, "approve")
+    
+    if resource_input.lower() == 'back':
+        return
+    
     try:
-        with get_db_connection() as conn:
-            c = conn.cursor()
-            
-            # Get pending resources
-            c.execute("""SELECT id, title, uploaded_by, file_type, upload_date, category_name 
-                         FROM resources WHERE status = 'pending' ORDER BY upload_date DESC""")
-            pending = c.fetchall()
-            
-            if not pending:
-                print("✅ No pending resources to approve!")
-                logging.info("No pending resources for approval")
-                return
-            
-            print("\n" + "="*80)
-            print("📋 PENDING RESOURCES FOR APPROVAL")
-            print("="*80)
-            
-            for resource in pending:
-                print(f"\n🆔 ID: {resource[0]}")
-                print(f"   📄 Title: {resource[1]}")
-                print(f"   👤 Uploaded by: {resource[2]}")
-                print(f"   📁 Type: {resource[3]}")
-                print(f"   🏷️  Category: {resource[5] or 'Uncategorized'}")
-                print(f"   📅 Upload Date: {resource[4]}")
-                print("-" * 70)
-            
-            resource_input = safe_input("\n➤ Enter resource ID to approve (or 'back' to return): ")
-            
-            if resource_input.lower() == 'back':
-                return
-            
-            if not resource_input or not resource_input.isdigit():
-                print("❌ Resource ID must be a valid number!")
-                logging.warning(f"Invalid resource ID input for approval: '{resource_input}'")
-                return
-            
-            resource_id = int(resource_input)
-            
-            # Check if resource exists and is pending
-            c.execute("SELECT status, uploaded_by, title FROM resources WHERE id = ?", (resource_id,))
-            result = c.fetchone()
-            
-            if not result:
-                print(f"❌ Resource with ID {resource_id} not found!")
-                logging.warning(f"Resource ID {resource_id} not found for approval")
-                return
-            
-            if result[0] != "pending":
-                print(f"⚠️  Resource ID {resource_id} is not pending (current status: {result[0]})!")
-                logging.warning(f"Resource ID {resource_id} not pending for approval")
-                return
-            
-            # Approve the resource
-            c.execute("UPDATE resources SET status = 'approved' WHERE id = ?", (resource_id,))
-            
-          
-            conn.commit()
-            print(f"✅ Resource ID {resource_id} approved successfully!")
-            logging.info(f"Resource ID {resource_id} approved successfully")
-                
-    except (ValueError, sqlite3.Error) as e:
-        print(f"❌ Error: {e}")
-        logging.error(f"Error in approve_resource: {e}")
-    except Exception as e:
-        print(f"❌ Unexpected error: {e}")
-        logging.error(f"Unexpected error in approve_resource: {e}")
+        resource_ids = parse_id_ranges(resource_input)
+    except ValueError as e:
+        print(f"❌ {e}")
+        logger.warning(f"Invalid resource ID input for approval: '{resource_input}'")
+        return
+    
+    # Approve the whole batch in a single transaction
+    with get_db_connection(write=True) as conn:
+        approved, missing, not_pending = _update_pending_resources(conn, resource_ids, "approved")
+    
+    for resource_id in missing:
+        print(f"❌ Resource with ID {resource_id} not found!")
+        logger.warning(f"Resource ID {resource_id} not found for approval")
+    for resource_id, status in not_pending.items():
+        print(f"⚠️  Resource ID {resource_id} is not pending (current status: {status})!")
+        logger.warning(f"Resource ID {resource_id} not pending for approval")
+    for resource_id in approved:
+        print(f"✅ Resource ID {resource_id} approved successfully!")
+        logger.info(f"Resource ID {resource_id} approved successfully")
 
+@admin_action
 def reject_resource():
-    """Reject pending resources with a reason and enhanced error handling."""
+    """Reject pending resources with a reason."""
+    # Listing runs on a read-only connection
+    with get_db_connection() as conn:
+        pending = _get_pending_resources(conn)
+    
+    if not pending:
+        print("✅ No pending resources to reject!")
+        logger.debug("No pending resources for rejection")
+        return
+    
+    print("\n" + "="*80)
+    print("🚫 PENDING RESOURCES FOR REJECTION")
+    print("="*80)
+    
+    resource_input = _browse_pending_resources(pending, _format_resource_rows, "reject")
+    
+    if resource_input.lower() == 'back':
+        return
+    
     try:
-        with get_db_connection() as conn:
-            c = conn.cursor()
-            
-            # Get pending resources
-            c.execute("""SELECT id, title, uploaded_by, file_type, upload_date, category_name 
-                         FROM resources WHERE status = 'pending' ORDER BY upload_date DESC""")
-            pending = c.fetchall()
-            
-            if not pending:
-                print("✅ No pending resources to reject!")
-                logging.info("No pending resources for rejection")
-                return
-            
-            print("\n" + "="*80)
-            print("🚫 PENDING RESOURCES FOR REJECTION")
-            print("="*80)
-            
-            for resource in pending:
-                category = resource[5] if resource[5] else "Uncategorized"
-                print(f"🆔 {resource[0]} | 📄 {resource[1]} | 👤 {resource[2]} | 📁 {resource[3]} | 🏷️  {category}")
-            
-            print("-" * 80)
-            
-            resource_input = safe_input("\n➤ Enter resource ID to reject (or 'back' to return): ")
-            
-            if resource_input.lower() == 'back':
-                return
-            
-            if not resource_input or not resource_input.isdigit():
-                print("❌ Resource ID must be a valid number!")
-                logging.warning(f"Invalid resource ID input for rejection: '{resource_input}'")
-                return
-            
-            resource_id = int(resource_input)
-            
-            # Get rejection reason
-            reason = safe_input("➤ Enter rejection reason: ")
-            
-            if not reason:
-                print("❌ Rejection reason cannot be empty!")
-                logging.warning(f"Empty rejection reason for resource ID {resource_id}")
-                return
-            
-            # Check if resource exists and is pending
-            c.execute("SELECT status, uploaded_by, title FROM resources WHERE id = ?", (resource_id,))
-            result = c.fetchone()
-            
-            if not result:
-                print(f"❌ Resource with ID {resource_id} not found!")
-                logging.warning(f"Resource ID {resource_id} not found for rejection")
-                return
-            
-            if result[0] != "pending":
-                print(f"⚠️  Resource ID {resource_id} is not pending (current status: {result[0]})!")
-                logging.warning(f"Resource ID {resource_id} not pending for rejection")
-                return
-            
-            # Reject the resource
-            c.execute("UPDATE resources SET status = 'rejected' WHERE id = ?", (resource_id,))
-            
-                    
-            
-            conn.commit()
-            print(f"✅ Resource ID {resource_id} rejected successfully!")
-            logging.info(f"Resource ID {resource_id} rejected with reason: {reason}")
-                
-    except (ValueError, sqlite3.Error) as e:
-        print(f"❌ Error: {e}")
-        logging.error(f"Error in reject_resource: {e}")
-    except Exception as e:
-        print(f"❌ Unexpected error: {e}")
-        logging.error(f"Unexpected error in reject_resource: {e}")
+        resource_ids = parse_id_ranges(resource_input)
+    except ValueError as e:
+        print(f"❌ {e}")
+        logger.warning(f"Invalid resource ID input for rejection: '{resource_input}'")
+        return
+    
+    # One reason applies to the whole batch
+    reason = safe_input("➤ Enter rejection reason: ")
+    
+    if not reason:
+        print("❌ Rejection reason cannot be empty!")
+        logger.warning(f"Empty rejection reason for resource IDs {sorted(resource_ids)}")
+        return
+    
+    with get_db_connection(write=True) as conn:
+        rejected, missing, not_pending = _update_pending_resources(conn, resource_ids, "rejected")
+    
+    for resource_id in missing:
+        print(f"❌ Resource with ID {resource_id} not found!")
+        logger.warning(f"Resource ID {resource_id} not found for rejection")
+    for resource_id, status in not_pending.items():
+        print(f"⚠️  Resource ID {resource_id} is not pending (current status: {status})!")
+        logger.warning(f"Resource ID {resource_id} not pending for rejection")
+    for resource_id in rejected:
+        print(f"✅ Resource ID {resource_id} rejected successfully!")
+        logger.info(f"Resource ID {resource_id} rejected with reason: {reason}")
 
 def manage_categories():
     """Manage categories with comprehensive error handling."""
@@ -295,298 +462,270 @@ def manage_categories():
                 print("❌ Invalid choice! Please select 1-6.")
                 continue
             
-            with get_db_connection() as conn:
-                c = conn.cursor()
+            # Every prompt comes before the writer is checked out, so the write lock is
+            # only held for the statements themselves and never while waiting for input
+            if choice == "1":
+                # View all categories; pages are cached until the database changes
+                offset = 0
+                with get_db_connection() as conn:
+                    categories = cached_query(conn, SQL_LIST_CATEGORIES, (PAGE_SIZE, offset))
                 
-                if choice == "1":
-                    # View all categories
-                    c.execute("""SELECT id, name, description, color, is_active, created_date 
-                                 FROM categories ORDER BY is_active DESC, name ASC""")
-                    categories = c.fetchall()
-                    
-                    if not categories:
-                        print("\n📭 No categories found.")
-                        logging.info("No categories found in manage_categories")
-                        continue
-                    
-                    print("\n" + "="*80)
-                    print("🗂️  ALL CATEGORIES")
-                    print("="*80)
-                    
-                    for cat in categories:
-                        status = "🟢 Active" if cat[4] else "🔴 Inactive"
-                        description = cat[2] if cat[2] else "No description"
-                        print(f"\n🆔 ID: {cat[0]} | 📝 Name: {cat[1]}")
-                        print(f"   📄 Description: {description}")
-                        print(f"   🎨 Color: {cat[3]} | {status}")
-                        print(f"   📅 Created: {cat[5]}")
-                        print("-" * 70)
-                        
-                elif choice == "2":
-                    # Add new category
-                    print("\n➕ ADD NEW CATEGORY")
-                    print("-" * 30)
-                    
-                    name = safe_input("➤ Category name: ")
-                    if not name:
-                        print("❌ Category name cannot be empty!")
-                        logging.warning("Empty category name input")
-                        continue
-                    
-                    # Check if category already exists
-                    c.execute("SELECT id FROM categories WHERE name = ? COLLATE NOCASE", (name,))
-                    if c.fetchone():
-                        print(f"❌ Category '{name}' already exists!")
-                        logging.warning(f"Attempted to create duplicate category: {name}")
-                        continue
-                    
-                    description = safe_input("➤ Description (optional): ")
-                    color = safe_input("➤ Color (hex, e.g., #ff5733, default #007bff): ") or "#007bff"
-                    
-                    # Validate hex color
-                    if not re.match(r'^#[0-9A-Fa-f]{6}$', color):
-                        print("⚠️  Invalid hex color format! Using default (#007bff).")
-                        logging.warning(f"Invalid hex color '{color}', using default #007bff")
-                        color = "#007bff"
+                if not categories:
+                    print("\n📭 No categories found.")
+                    logger.debug("No categories found in manage_categories")
+                    continue
+                
+                print("\n" + "="*80)
+                print("🗂️  ALL CATEGORIES")
+                print("="*80)
+                
+                while categories:
+                    write_lines(_format_categories(categories))
+                    if len(categories) < PAGE_SIZE:
+                        break
+                    if safe_input("➤ Press Enter for more categories (or 'q' to stop): ").lower() == 'q':
+                        break
+                    offset += PAGE_SIZE
+                    with get_db_connection() as conn:
+                        categories = cached_query(conn, SQL_LIST_CATEGORIES, (PAGE_SIZE, offset))
                     
-                    # Insert new category
-                    c.execute("""INSERT INTO categories (name, description, color, created_by, created_date, is_active) 
-                                 VALUES (?, ?, ?, ?, ?, ?)""",
-                              (name, description or None, color, "admin", 
-                               datetime.now().strftime("%Y-%m-%d %H:%M:%S"), 1))
+            elif choice == "2":
+                # Add new category
+                print("\n➕ ADD NEW CATEGORY")
+                print("-" * 30)
+                
+                name = safe_input("➤ Category name: ")
+                if not name:
+                    print("❌ Category name cannot be empty!")
+                    logger.warning("Empty category name input")
+                    continue
+                
+                # Check if category already exists
+                with get_db_connection() as conn:
+                    exists = conn.execute(SQL_CATEGORY_BY_NAME, (name,)).fetchone()
+                if exists:
+                    print(f"❌ Category '{name}' already exists!")
+                    logger.warning(f"Attempted to create duplicate category: {name}")
+                    continue
+                
+                description = safe_input("➤ Description (optional): ")
+                color = safe_input("➤ Color (hex, e.g., #ff5733, default #007bff): ") or "#007bff"
+                
+                # Validate hex color
+                if not _HEX_COLOR_RE.match(color):
+                    print("⚠️  Invalid hex color format! Using default (#007bff).")
+                    logger.warning(f"Invalid hex color '{color}', using default #007bff")
+                    color = "#007bff"
+                
+                # A category created with the same name since the check above is rejected
+                # by the unique name_lower index
+                with get_db_connection(write=True) as conn:
+                    conn.execute("BEGIN IMMEDIATE")
+                    conn.execute(SQL_INSERT_CATEGORY, (name, description or None, color, "admin"))
                     conn.commit()
+                
+                print(f"✅ Category '{name}' added successfully!")
+                logger.info(f"Category '{name}' added by admin")
                     
-                    print(f"✅ Category '{name}' added successfully!")
-                    logging.info(f"Category '{name}' added by admin")
-                        
-                elif choice == "3":
-                    # Edit category
-                    print("\n✏️  EDIT CATEGORY")
-                    print("-" * 25)
-                    
-                    cat_input = safe_input("➤ Category ID to edit: ")
-                    if not cat_input or not cat_input.isdigit():
-                        print("❌ Category ID must be a valid number!")
-                        logging.warning(f"Invalid category ID input for edit: '{cat_input}'")
-                        continue
-                    
-                    cat_id = int(cat_input)
-                    c.execute("SELECT name, description, color FROM categories WHERE id = ?", (cat_id,))
-                    result = c.fetchone()
-                    
-                    if not result:
-                        print(f"❌ Category with ID {cat_id} not found!")
-                        logging.warning(f"Category ID {cat_id} not found for edit")
-                        continue
-                    
-                    print(f"\n📋 Current Category Details:")
-                    print(f"   Name: '{result[0]}'")
-                    print(f"   Description: '{result[1] or 'None'}'")
-                    print(f"   Color: '{result[2]}'")
-                    
-                    name = safe_input("➤ New name (press Enter to keep current): ") or result[0]
-                    description = safe_input("➤ New description (press Enter to keep current): ") or result[1]
-                    color = safe_input("➤ New color (press Enter to keep current): ") or result[2]
-                    
-                    # Validate hex color if changed
-                    if color != result[2] and not re.match(r'^#[0-9A-Fa-f]{6}$', color):
-                        print("⚠️  Invalid hex color format! Using current color.")
-                        logging.warning(f"Invalid hex color '{color}' for category ID {cat_id}")
-                        color = result[2]
-                    
-                    c.execute("UPDATE categories SET name = ?, description = ?, color = ? WHERE id = ?",
-                              (name, description, color, cat_id))
+            elif choice == "3":
+                # Edit category
+                print("\n✏️  EDIT CATEGORY")
+                print("-" * 25)
+                
+                cat_input = safe_input("➤ Category ID to edit: ")
+                if not cat_input or not cat_input.isdigit():
+                    print("❌ Category ID must be a valid number!")
+                    logger.warning(f"Invalid category ID input for edit: '{cat_input}'")
+                    continue
+                
+                cat_id = int(cat_input)
+                with get_db_connection() as conn:
+                    result = conn.execute(SQL_CATEGORY_DETAILS, (cat_id,)).fetchone()
+                
+                if not result:
+                    print(f"❌ Category with ID {cat_id} not found!")
+                    logger.warning(f"Category ID {cat_id} not found for edit")
+                    continue
+                
+                print(f"\n📋 Current Category Details:")
+                print(f"   Name: '{result['name']}'")
+                print(f"   Description: '{result['description'] or 'None'}'")
+                print(f"   Color: '{result['color']}'")
+                
+                name = safe_input("➤ New name (press Enter to keep current): ") or result['name']
+                description = safe_input("➤ New description (press Enter to keep current): ") or result['description']
+                color = safe_input("➤ New color (press Enter to keep current): ") or result['color']
+                
+                # Validate hex color if changed
+                if color != result['color'] and not _HEX_COLOR_RE.match(color):
+                    print("⚠️  Invalid hex color format! Using current color.")
+                    logger.warning(f"Invalid hex color '{color}' for category ID {cat_id}")
+                    color = result['color']
+                
+                with get_db_connection(write=True) as conn:
+                    conn.execute("BEGIN IMMEDIATE")
+                    # resources.category_name references categories(name) with no ON UPDATE
+                    # action, so a rename moves the resources along in the same transaction;
+                    # the foreign key is checked at commit, once both sides carry the new name
+                    conn.execute("PRAGMA defer_foreign_keys=ON")
+                    current = conn.execute(SQL_CATEGORY_NAME, (cat_id,)).fetchone()
+                    if current:
+                        conn.execute(SQL_UPDATE_CATEGORY, (name, description, color, cat_id))
+                        if name != current['name']:
+                            conn.execute(SQL_RENAME_CATEGORY_RESOURCES, (name, current['name']))
                     conn.commit()
+                
+                if not current:
+                    # Deleted while the new values were being entered
+                    print(f"❌ Category with ID {cat_id} not found!")
+                    logger.warning(f"Category ID {cat_id} disappeared before edit")
+                    continue
+                
+                print(f"✅ Category ID {cat_id} updated successfully!")
+                logger.info(f"Category ID {cat_id} updated")
                     
-                    print(f"✅ Category ID {cat_id} updated successfully!")
-                    logging.info(f"Category ID {cat_id} updated")
-                        
-                elif choice == "4":
-                    # Deactivate category
-                    print("\n❌ DEACTIVATE CATEGORY")
-                    print("-" * 30)
-                    
-                    cat_input = safe_input("➤ Category ID to deactivate: ")
-                    if not cat_input or not cat_input.isdigit():
-                        print("❌ Category ID must be a valid number!")
-                        logging.warning(f"Invalid category ID input for deactivation: '{cat_input}'")
-                        continue
-                    
-                    cat_id = int(cat_input)
-                    
-                    # Check if category exists and is active
-                    c.execute("SELECT name, is_active FROM categories WHERE id = ?", (cat_id,))
-                    result = c.fetchone()
-                    
+            elif choice == "4":
+                # Deactivate category
+                print("\n❌ DEACTIVATE CATEGORY")
+                print("-" * 30)
+                
+                cat_input = safe_input("➤ Category ID to deactivate: ")
+                if not cat_input or not cat_input.isdigit():
+                    print("❌ Category ID must be a valid number!")
+                    logger.warning(f"Invalid category ID input for deactivation: '{cat_input}'")
+                    continue
+                
+                cat_id = int(cat_input)
+                with get_db_connection(write=True) as conn:
+                    name = _set_category_active(conn, cat_id, False)
+                    if name is None:
+                        # Nothing changed: either the ID is unknown or the category is already inactive
+                        result = conn.execute(SQL_CATEGORY_NAME, (cat_id,)).fetchone()
+                
+                if name is None:
                     if not result:
                         print(f"❌ Category with ID {cat_id} not found!")
-                        logging.warning(f"Category ID {cat_id} not found for deactivation")
-                        continue
-                    
-                    if not result[1]:
-                        print(f"⚠️  Category '{result[0]}' is already inactive!")
-                        continue
-                    
-                    c.execute("UPDATE categories SET is_active = 0 WHERE id = ?", (cat_id,))
-                    conn.commit()
-                    
-                    print(f"✅ Category '{result[0]}' deactivated successfully!")
-                    logging.info(f"Category ID {cat_id} deactivated")
-                        
-                elif choice == "5":
-                    # Activate category
-                    print("\n✅ ACTIVATE CATEGORY")
-                    print("-" * 28)
-                    
-                    cat_input = safe_input("➤ Category ID to activate: ")
-                    if not cat_input or not cat_input.isdigit():
-                        print("❌ Category ID must be a valid number!")
-                        logging.warning(f"Invalid category ID input for activation: '{cat_input}'")
-                        continue
-                    
-                    cat_id = int(cat_input)
-                    
-                    # Check if category exists and is inactive
-                    c.execute("SELECT name, is_active FROM categories WHERE id = ?", (cat_id,))
-                    result = c.fetchone()
+                        logger.warning(f"Category ID {cat_id} not found for deactivation")
+                    else:
+                        print(f"⚠️  Category '{result['name']}' is already inactive!")
+                    continue
+                
+                print(f"✅ Category '{name}' deactivated successfully!")
+                logger.info(f"Category ID {cat_id} deactivated")
                     
+            elif choice == "5":
+                # Activate category
+                print("\n✅ ACTIVATE CATEGORY")
+                print("-" * 28)
+                
+                cat_input = safe_input("➤ Category ID to activate: ")
+                if not cat_input or not cat_input.isdigit():
+                    print("❌ Category ID must be a valid number!")
+                    logger.warning(f"Invalid category ID input for activation: '{cat_input}'")
+                    continue
+                
+                cat_id = int(cat_input)
+                with get_db_connection(write=True) as conn:
+                    name = _set_category_active(conn, cat_id, True)
+                    if name is None:
+                        # Nothing changed: either the ID is unknown or the category is already active
+                        result = conn.execute(SQL_CATEGORY_NAME, (cat_id,)).fetchone()
+                
+                if name is None:
                     if not result:
                         print(f"❌ Category with ID {cat_id} not found!")
-                        logging.warning(f"Category ID {cat_id} not found for activation")
-                        continue
-                    
-                    if result[1]:
-                        print(f"⚠️  Category '{result[0]}' is already active!")
-                        continue
-                    
-                    c.execute("UPDATE categories SET is_active = 1 WHERE id = ?", (cat_id,))
-                    conn.commit()
-                    
-                    print(f"✅ Category '{result[0]}' activated successfully!")
-                    logging.info(f"Category ID {cat_id} activated")
+                        logger.warning(f"Category ID {cat_id} not found for activation")
+                    else:
+                        print(f"⚠️  Category '{result['name']}' is already active!")
+                    continue
+                
+                print(f"✅ Category '{name}' activated successfully!")
+                logger.info(f"Category ID {cat_id} activated")
                     
         except sqlite3.Error as e:
             print(f"❌ Database error: {e}")
-            logging.error(f"Database error in manage_categories: {e}")
+            logger.error(f"Database error in manage_categories: {e}")
         except Exception as e:
             print(f"❌ Unexpected error: {e}")
-            logging.error(f"Unexpected error in manage_categories: {e}")
+            logger.error(f"Unexpected error in manage_categories: {e}")
 
-def view_system_stats():
-    """Display comprehensive system statistics with enhanced error handling."""
+@admin_action(connection="read")
+def view_system_stats(conn):
+    """Display comprehensive system statistics."""
+    # Collect the whole dashboard and write it once
+    out = []
+    
+    out.append("\n" + "="*70)
+    out.append("📊 SYSTEM STATISTICS DASHBOARD")
+    out.append("="*70)
+    
+    # Counters are maintained by triggers, so this is a single indexed lookup
     try:
-        with get_db_connection() as conn:
-            c = conn.cursor()
-            
-            print("\n" + "="*70)
-            print("📊 SYSTEM STATISTICS DASHBOARD")
-            print("="*70)
-            
-            # User Statistics
-            try:
-                c.execute("SELECT COUNT(*) FROM users WHERE role = 'user' OR role IS NULL")
-                total_users = c.fetchone()[0]
-                c.execute("SELECT COUNT(*) FROM users WHERE (role = 'user' OR role IS NULL) AND is_verified = 1")
-                verified_users = c.fetchone()[0]
-                c.execute("SELECT COUNT(*) FROM users WHERE (role = 'user' OR role IS NULL) AND is_verified = 0")
-                pending_users = c.fetchone()[0]
-                
-                print(f"\n👥 USER STATISTICS")
-                print(f"   Total Users: {total_users}")
-                print(f"   ✅ Verified: {verified_users}")
-                print(f"   ⏳ Pending: {pending_users}")
-                
-            except sqlite3.Error as e:
-                print(f"⚠️  Could not fetch user statistics: {e}")
-                logging.error(f"Error fetching user statistics: {e}")
-            
-            # Resource Statistics
-            try:
-                c.execute("SELECT COUNT(*) FROM resources")
-                total_resources = c.fetchone()[0]
-                c.execute("SELECT COUNT(*) FROM resources WHERE status = 'approved'")
-                approved_resources = c.fetchone()[0]
-                c.execute("SELECT COUNT(*) FROM resources WHERE status = 'pending'")
-                pending_resources = c.fetchone()[0]
-                c.execute("SELECT COUNT(*) FROM resources WHERE status = 'rejected'")
-                rejected_resources = c.fetchone()[0]
-                
-                print(f"\n📄 RESOURCE STATISTICS")
-                print(f"   Total Resources: {total_resources}")
-                print(f"   ✅ Approved: {approved_resources}")
-                print(f"   ⏳ Pending: {pending_resources}")
-                print(f"   ❌ Rejected: {rejected_resources}")
-                
-            except sqlite3.Error as e:
-                print(f"⚠️  Could not fetch resource statistics: {e}")
-                logging.error(f"Error fetching resource statistics: {e}")
-            
-            # Category Statistics
-            try:
-                c.execute("SELECT COUNT(*) FROM categories")
-                total_categories = c.fetchone()[0]
-                c.execute("SELECT COUNT(*) FROM categories WHERE is_active = 1")
-                active_categories = c.fetchone()[0]
-                c.execute("SELECT COUNT(*) FROM categories WHERE is_active = 0")
-                inactive_categories = c.fetchone()[0]
-                
-                print(f"\n🗂️  CATEGORY STATISTICS")
-                print(f"   Total Categories: {total_categories}")
-                print(f"   🟢 Active: {active_categories}")
-                print(f"   🔴 Inactive: {inactive_categories}")
-                
-            except sqlite3.Error as e:
-                print(f"⚠️  Could not fetch category statistics: {e}")
-                logging.error(f"Error fetching category statistics: {e}")
-            
-            # Top Categories by Resource Count
-            try:
-                c.execute("""SELECT category_name, COUNT(*) as count 
-                             FROM resources 
-                             WHERE status = 'approved' AND category_name IS NOT NULL
-                             GROUP BY category_name 
-                             ORDER BY count DESC 
-                             LIMIT 5""")
-                top_categories = c.fetchall()
-                
-                if top_categories:
-                    print(f"\n🏆 TOP CATEGORIES BY APPROVED RESOURCES")
-                    for i, cat in enumerate(top_categories, 1):
-                        print(f"   {i}. {cat[0]}: {cat[1]} resources")
-                else:
-                    print(f"\n📭 No approved resources with categories found.")
-                    
-            except sqlite3.Error as e:
-                print(f"⚠️  Could not fetch top categories: {e}")
-                logging.error(f"Error fetching top categories: {e}")
-            
-            # Recent Activity (if tables have timestamp columns)
-            try:
-                c.execute("""SELECT COUNT(*) FROM users 
-                             WHERE join_date >= date('now', '-7 days')""")
-                recent_users = c.fetchone()[0]
-                
-                c.execute("""SELECT COUNT(*) FROM resources 
-                             WHERE upload_date >= date('now', '-7 days')""")
-                recent_resources = c.fetchone()[0]
-                
-                print(f"\n📈 RECENT ACTIVITY (Last 7 Days)")
-                print(f"   New Users: {recent_users}")
-                print(f"   New Resources: {recent_resources}")
-                
-            except sqlite3.Error as e:
-                print(f"⚠️  Could not fetch recent activity: {e}")
-                logging.error(f"Error fetching recent activity: {e}")
-            
-            print("="*70)
-            logging.info("System statistics viewed successfully")
+        stats = {row['key']: row['value'] for row in conn.execute(SQL_DASHBOARD_STATS)}
+        
+        out.append(f"\n👥 USER STATISTICS")
+        out.append(f"   Total Users: {stats.get('users_total', 0)}")
+        out.append(f"   ✅ Verified: {stats.get('users_verified', 0)}")
+        out.append(f"   ⏳ Pending: {stats.get('users_pending', 0)}")
+        
+        out.append(f"\n📄 RESOURCE STATISTICS")
+        out.append(f"   Total Resources: {stats.get('resources_total', 0)}")
+        out.append(f"   ✅ Approved: {stats.get('resources_approved', 0)}")
+        out.append(f"   ⏳ Pending: {stats.get('resources_pending', 0)}")
+        out.append(f"   ❌ Rejected: {stats.get('resources_rejected', 0)}")
+        
+        out.append(f"\n🗂️  CATEGORY STATISTICS")
+        out.append(f"   Total Categories: {stats.get('categories_total', 0)}")
+        out.append(f"   🟢 Active: {stats.get('categories_active', 0)}")
+        out.append(f"   🔴 Inactive: {stats.get('categories_inactive', 0)}")
+        
+    except sqlite3.Error as e:
+        out.append(f"⚠️  Could not fetch statistics: {e}")
+        logger.error(f"Error fetching dashboard statistics: {e}")
+    
+    # Top Categories by Resource Count
+    try:
+        # Resolved resources are counted under their category's current name; those whose
+        # category_name has no categories row still count under the stored name
+        top_categories = conn.execute("""SELECT coalesce(cat.name, r.category_name) AS category_name,
+                                                COUNT(*) as count 
+                                         FROM resources r
+                                         LEFT JOIN categories cat ON cat.id = r.category_id
+                                         WHERE r.status = 'approved'
+                                           AND coalesce(cat.name, r.category_name) IS NOT NULL
+                                         GROUP BY coalesce(cat.name, r.category_name) 
+                                         ORDER BY count DESC 
+                                         LIMIT 5""").fetchall()
+        
+        if top_categories:
+            out.append(f"\n🏆 TOP CATEGORIES BY APPROVED RESOURCES")
+            for i, cat in enumerate(top_categories, 1):
+                out.append(f"   {i}. {cat['category_name']}: {cat['count']} resources")
+        else:
+            out.append(f"\n📭 No approved resources with categories found.")
             
     except sqlite3.Error as e:
-        print(f"❌ Database error: {e}")
-        logging.error(f"Database error in view_system_stats: {e}")
-    except Exception as e:
-        print(f"❌ Unexpected error: {e}")
-        logging.error(f"Unexpected error in view_system_stats: {e}")
+        out.append(f"⚠️  Could not fetch top categories: {e}")
+        logger.error(f"Error fetching top categories: {e}")
+    
+    # Recent Activity (if tables have timestamp columns)
+    try:
+        recent_users, recent_resources = conn.execute("""SELECT (SELECT COUNT(*) FROM users
+                                                                 WHERE join_date >= date('now', '-7 days')),
+                                                                (SELECT COUNT(*) FROM resources
+                                                                 WHERE upload_date >= date('now', '-7 days'))""").fetchone()
+        
+        out.append(f"\n📈 RECENT ACTIVITY (Last 7 Days)")
+        out.append(f"   New Users: {recent_users}")
+        out.append(f"   New Resources: {recent_resources}")
+        
+    except sqlite3.Error as e:
+        out.append(f"⚠️  Could not fetch recent activity: {e}")
+        logger.error(f"Error fetching recent activity: {e}")
+    
+    out.append("="*70)
+    write_lines(line + "\n" for line in out)
+    logger.info("System statistics viewed successfully")
 
 def enhanced_admin_menu(username):
     """Display and handle the enhanced admin menu with comprehensive error handling."""
@@ -609,55 +748,61 @@ def enhanced_admin_menu(username):
             if choice == "6":
                 print("👋 Returning to main menu...")
                 break
-            elif choice == "1":
-                print("\n🔍 Loading user verification...")
-                verify_user()
-            elif choice == "2":
-                print("\n👍 Loading resource approval...")
-                approve_resource()
-            elif choice == "3":
-                print("\n👎 Loading resource rejection...")
-                reject_resource()
-            elif choice == "4":
-                print("\n🗂️  Loading category management...")
-                manage_categories()
-            elif choice == "5":
-                print("\n📊 Loading system statistics...")
-                view_system_stats()
+            elif choice in ADMIN_MENU:
+                message, action = ADMIN_MENU[choice]
+                print(message)
+                action()
             elif choice == "":
                 print("⚠️  Please enter a valid option.")
                 continue
             else:
                 print("❌ Invalid choice! Please select an option from 1-6.")
-                logging.warning(f"Invalid admin menu choice by '{username}': {choice}")
+                logger.warning(f"Invalid admin menu choice by '{username}': {choice}")
                 
         except KeyboardInterrupt:
             print("\n\n⚠️  Operation interrupted by user. Returning to menu...")
             continue
         except Exception as e:
             print(f"❌ Unexpected error in admin menu: {e}")
-            logging.error(f"Unexpected error in enhanced_admin_menu for '{username}': {e}")
+            logger.error(f"Unexpected error in enhanced_admin_menu for '{username}': {e}")
             continue
 
+# Admin menu choice -> (loading message, action)
+ADMIN_MENU = {
+    "1": ("\n🔍 Loading user verification...", verify_user),
+    "2": ("\n👍 Loading resource approval...", approve_resource),
+    "3": ("\n👎 Loading resource rejection...", reject_resource),
+    "4": ("\n🗂️  Loading category management...", manage_categories),
+    "5": ("\n📊 Loading system statistics...", view_system_stats),
+}
+
+@admin_action(connection="write")
+def recompute_dashboard_stats(conn):
+    """Rebuild the dashboard counters and resource_overview from the source tables."""
+    recompute_stats(conn)
+    refresh_resource_overview(conn)
+    print("✅ Dashboard statistics recomputed")
+    logger.info("Dashboard statistics recomputed")
+
 # Optional: Add a test function to check database connectivity
 def test_database_connection():
     """Test database connection and setup."""
     try:
         with get_db_connection() as conn:
-            c = conn.cursor()
-            c.execute("SELECT name FROM sqlite_master WHERE type='table';")
-            tables = c.fetchall()
+            tables = conn.execute("SELECT name FROM sqlite_master WHERE type='table';").fetchall()
             print(f"✅ Database connection successful. Found {len(tables)} tables.")
             return True
     except Exception as e:
         print(f"❌ Database connection failed: {e}")
-        logging.error(f"Database connection test failed: {e}")
+        logger.error(f"Database connection test failed: {e}")
         return False
 
 # Main execution guard
 if __name__ == "__main__":
+    if sys.argv[1:] == ["recompute-stats"]:
+        recompute_dashboard_stats()
     # Test database connection on module load
-    if test_database_connection():
+    elif test_database_connection():
         print("🚀 Admin module loaded successfully!")
     else:
         print("⚠️  Warning: Database connection issues detected.")
\ No newline at end of file
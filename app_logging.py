@@ -0,0 +1,39 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+
+LOG_FILE = "system.log"
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+_listener = None
+
+def setup_logging(level=logging.INFO):
+    """Route all logging through a queue drained by a background file writer.
+
+    Callers only enqueue records; formatting and disk writes happen on the
+    QueueListener thread. Safe to call from every module, only the first call
+    installs handlers.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    file_handler = logging.handlers.RotatingFileHandler(
+        LOG_FILE, maxBytes=10 * 1024 * 1024, backupCount=5, encoding="utf-8")
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    _listener = logging.handlers.QueueListener(log_queue, file_handler)
+    _listener.start()
+    # Flush queued records before the interpreter exits
+    atexit.register(_listener.stop)
+
+def get_logger(name):
+    """Return a named logger backed by the shared queue handler."""
+    setup_logging()
+    return logging.getLogger(name)
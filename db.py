@@ -1,24 +1,631 @@
+import atexit
+import functools
+import itertools
 import os
+import queue
 import sqlite3
+import threading
+import time
 import bcrypt
 from datetime import datetime
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from db_pool import ConnectionPool
+from app_logging import setup_logging
+
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import InvalidHashError, VerificationError
+except ImportError:
+    PasswordHasher = None
 
 # Configure logging
-logging.basicConfig(filename='system.log', level=logging.INFO,
-                    format='%(asctime)s - %(levelname)s - %(message)s')
+setup_logging()
 
 DB_FILE = "resources.db"
 RESOURCES_DIR = "resources"
 VIDEOS_DIR = "videos"
 EXPORTS_DIR = "exports"
 
+# bcrypt work factor for new hashes; existing hashes keep the cost they were made with
+BCRYPT_COST = int(os.environ.get("BCRYPT_COST", "10"))
+# PASSWORD_HASHER=argon2id hashes new passwords with Argon2id (requires argon2-cffi)
+PASSWORD_HASHER = os.environ.get("PASSWORD_HASHER", "bcrypt")
+
+_argon2 = PasswordHasher(time_cost=2, memory_cost=65536, parallelism=4) if PasswordHasher else None
+if PASSWORD_HASHER == "argon2id" and _argon2 is None:
+    logging.warning("PASSWORD_HASHER=argon2id but argon2-cffi is not installed; using bcrypt")
+
+# bcrypt and argon2 release the GIL while hashing, so password checks run on these
+# threads and concurrent logins verify in parallel
+_HASH_POOL = ThreadPoolExecutor(max_workers=os.cpu_count() or 4, thread_name_prefix="password-hash")
+
+# Login/signup statements. The pool opens connections with cached_statements=256, so
+# sqlite3 keeps each prepared statement per connection keyed by this exact text.
+# join_date is stamped by SQLite in local time, matching the app's other timestamps
+SQL_INSERT_USER = """INSERT INTO users (username, password, role, is_verified, full_name, email, user_type, join_date)
+                     VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now', 'localtime'))"""
+# username_lower is filled here rather than left to its trigger, so a case-variant
+# duplicate is skipped by ON CONFLICT instead of failing inside the trigger
+SQL_INSERT_USERS_BULK = """INSERT INTO users (username, password, role, is_verified, full_name, email, user_type,
+                                             join_date, username_lower)
+                           VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now', 'localtime'), lower(?1))
+                           ON CONFLICT DO NOTHING"""
+SQL_USER_AUTH = "SELECT password, role FROM users WHERE username = ? AND is_verified = 1"
+SQL_UPDATE_LAST_ACTIVE = "UPDATE users SET last_active = ? WHERE username = ?"
+# Gate for uploads and study-group actions
+SQL_USER_VERIFIED = "SELECT is_verified FROM users WHERE username = ?"
+SQL_SEED_ADMIN = """INSERT INTO users (username, password, role, is_verified, user_type, join_date)
+                    VALUES ('admin', ?, 'admin', 1, 'admin', datetime('now', 'localtime'))
+                    ON CONFLICT(username) DO NOTHING"""
+
+# Optional precomputed hash for the default admin, so first boot does not hash "admin123"
+ADMIN_PW_HASH = os.environ.get("ADMIN_PW_HASH")
+
+# Shared connection pool; connections are opened lazily on first checkout
+pool = ConnectionPool(DB_FILE)
+atexit.register(pool.close_all)
+
+# Logins stamp last_active here; flush_last_active() writes them every few seconds
+LAST_ACTIVE_FLUSH_INTERVAL = 5.0
+_last_active_buffer = {}
+_last_active_lock = threading.Lock()
+_last_active_timer = None
+
+# Fire-and-forget writes: queue_write() hands statement groups to one background thread,
+# which commits up to WRITE_BATCH_SIZE groups per transaction, waiting at most
+# WRITE_BATCH_WAIT seconds after the first for more to arrive. Once the queue drains it
+# runs a PASSIVE WAL checkpoint, at most every WAL_CHECKPOINT_INTERVAL seconds
+WRITE_BATCH_SIZE = 64
+WRITE_BATCH_WAIT = 0.1
+WAL_CHECKPOINT_INTERVAL = 30.0
+_write_queue = queue.Queue()
+_write_thread = None
+_write_thread_lock = threading.Lock()
+
+_SCHEMA_SQL = """
+-- Users table
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    password TEXT NOT NULL,
+    role TEXT DEFAULT 'user',
+    is_verified INTEGER DEFAULT 0,
+    full_name TEXT,
+    email TEXT,
+    user_type TEXT DEFAULT 'student',
+    join_date TEXT DEFAULT (datetime('now')),
+    last_active TEXT,
+    study_streak INTEGER DEFAULT 0,
+    total_study_hours INTEGER DEFAULT 0,
+    username_lower TEXT
+);
+
+-- Categories
+CREATE TABLE IF NOT EXISTS categories (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT UNIQUE,
+    description TEXT,
+    color TEXT,
+    created_by TEXT,
+    created_date TEXT DEFAULT (datetime('now')),
+    is_active INTEGER DEFAULT 1,
+    name_lower TEXT,
+    FOREIGN KEY (created_by) REFERENCES users(username) ON DELETE SET NULL
+);
+
+-- Resources
+CREATE TABLE IF NOT EXISTS resources (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT,
+    description TEXT,
+    category_name TEXT,
+    uploaded_by TEXT,
+    file_path TEXT,
+    file_type TEXT,
+    upload_date TEXT DEFAULT (datetime('now')),
+    status TEXT DEFAULT 'pending',
+    download_count INTEGER DEFAULT 0,
+    file_size INTEGER,
+    tags TEXT,
+    is_video INTEGER DEFAULT 0,
+    video_duration TEXT,
+    share_link TEXT,
+    difficulty_level TEXT,
+    estimated_time TEXT,
+    upload_epoch INTEGER,
+    category_id INTEGER,
+    FOREIGN KEY (category_name) REFERENCES categories(name) ON DELETE SET NULL,
+    FOREIGN KEY (uploaded_by) REFERENCES users(username) ON DELETE CASCADE
+);
+
+-- Reviews
+CREATE TABLE IF NOT EXISTS reviews (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    resource_id INTEGER,
+    reviewer TEXT,
+    rating INTEGER,
+    comment TEXT,
+    review_date TEXT DEFAULT (datetime('now')),
+    helpfulness INTEGER DEFAULT 0,
+    FOREIGN KEY (resource_id) REFERENCES resources(id) ON DELETE CASCADE,
+    FOREIGN KEY (reviewer) REFERENCES users(username) ON DELETE CASCADE
+);
+
+-- Favorites
+CREATE TABLE IF NOT EXISTS favorites (
+    user_id TEXT,
+    resource_id INTEGER,
+    added_date TEXT DEFAULT (datetime('now')),
+    PRIMARY KEY (user_id, resource_id),
+    FOREIGN KEY (user_id) REFERENCES users(username) ON DELETE CASCADE,
+    FOREIGN KEY (resource_id) REFERENCES resources(id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+-- Study groups
+CREATE TABLE IF NOT EXISTS study_groups (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT,
+    description TEXT,
+    subject TEXT,
+    created_by TEXT,
+    created_date TEXT DEFAULT (datetime('now')),
+    max_members INTEGER DEFAULT 20,
+    is_private INTEGER DEFAULT 0,
+    meeting_schedule TEXT,
+    group_code TEXT UNIQUE,
+    FOREIGN KEY (created_by) REFERENCES users(username) ON DELETE SET NULL
+);
+
+-- Group members
+CREATE TABLE IF NOT EXISTS group_members (
+    group_id INTEGER,
+    member_username TEXT,
+    join_date TEXT DEFAULT (datetime('now')),
+    role TEXT DEFAULT 'member',
+    is_active INTEGER DEFAULT 1,
+    contribution_score INTEGER DEFAULT 0,
+    PRIMARY KEY (group_id, member_username),
+    FOREIGN KEY (group_id) REFERENCES study_groups(id) ON DELETE CASCADE,
+    FOREIGN KEY (member_username) REFERENCES users(username) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+-- Messages
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sender TEXT,
+    recipient TEXT,
+    subject TEXT,
+    message TEXT,
+    sent_date TEXT DEFAULT (datetime('now')),
+    is_read INTEGER DEFAULT 0,
+    message_type TEXT DEFAULT 'direct',
+    group_id INTEGER DEFAULT NULL,
+    FOREIGN KEY (sender) REFERENCES users(username) ON DELETE CASCADE,
+    FOREIGN KEY (recipient) REFERENCES users(username) ON DELETE CASCADE,
+    FOREIGN KEY (group_id) REFERENCES study_groups(id) ON DELETE SET NULL
+);
+
+-- Notifications
+CREATE TABLE IF NOT EXISTS notifications (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT,
+    message TEXT,
+    notification_type TEXT,
+    is_read INTEGER DEFAULT 0,
+    created_date TEXT DEFAULT (datetime('now')),
+    related_id INTEGER,
+    action_url TEXT,
+    FOREIGN KEY (user_id) REFERENCES users(username) ON DELETE CASCADE
+);
+
+-- Download history
+CREATE TABLE IF NOT EXISTS download_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT,
+    resource_id INTEGER,
+    download_date TEXT DEFAULT (datetime('now')),
+    source TEXT DEFAULT 'direct',
+    FOREIGN KEY (user_id) REFERENCES users(username) ON DELETE CASCADE,
+    FOREIGN KEY (resource_id) REFERENCES resources(id) ON DELETE CASCADE
+);
+
+-- Study sessions
+CREATE TABLE IF NOT EXISTS study_sessions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT,
+    resource_id INTEGER,
+    start_time TEXT,
+    end_time TEXT,
+    duration_minutes INTEGER,
+    progress_percentage INTEGER,
+    session_type TEXT,
+    notes TEXT,
+    FOREIGN KEY (user_id) REFERENCES users(username) ON DELETE CASCADE,
+    FOREIGN KEY (resource_id) REFERENCES resources(id) ON DELETE CASCADE
+);
+
+-- Calendar events
+CREATE TABLE IF NOT EXISTS calendar_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT,
+    title TEXT,
+    description TEXT,
+    start_datetime TEXT,
+    end_datetime TEXT,
+    event_type TEXT,
+    related_id INTEGER,
+    reminder_minutes INTEGER DEFAULT 15,
+    is_completed INTEGER DEFAULT 0,
+    start_epoch INTEGER,
+    end_epoch INTEGER,
+    FOREIGN KEY (user_id) REFERENCES users(username) ON DELETE CASCADE
+);
+
+-- Learning progress
+CREATE TABLE IF NOT EXISTS learning_progress (
+    user_id TEXT,
+    category_name TEXT,
+    total_resources INTEGER,
+    completed_resources INTEGER,
+    total_time_minutes INTEGER,
+    last_updated TEXT DEFAULT (datetime('now')),
+    PRIMARY KEY (user_id, category_name),
+    FOREIGN KEY (user_id) REFERENCES users(username) ON DELETE CASCADE
+);
+
+-- User interactions
+CREATE TABLE IF NOT EXISTS user_interactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT,
+    resource_id INTEGER,
+    interaction_type TEXT,
+    interaction_date TEXT DEFAULT (datetime('now')),
+    interaction_value INTEGER DEFAULT 1,
+    FOREIGN KEY (user_id) REFERENCES users(username) ON DELETE CASCADE,
+    FOREIGN KEY (resource_id) REFERENCES resources(id) ON DELETE CASCADE
+);
+
+-- Indexes
+CREATE INDEX IF NOT EXISTS idx_resources_category ON resources(category_name);
+CREATE INDEX IF NOT EXISTS idx_resources_uploaded_by ON resources(uploaded_by);
+
+-- Indexes for the admin listing and dashboard predicates
+CREATE INDEX IF NOT EXISTS idx_users_is_verified ON users(is_verified);
+CREATE INDEX IF NOT EXISTS idx_users_join_date ON users(join_date);
+CREATE INDEX IF NOT EXISTS idx_resources_status_epoch ON resources(status, upload_epoch DESC);
+CREATE INDEX IF NOT EXISTS idx_resources_status_category ON resources(status, category_id);
+CREATE INDEX IF NOT EXISTS idx_resources_upload_date ON resources(upload_date);
+CREATE INDEX IF NOT EXISTS idx_categories_active_name ON categories(is_active DESC, name ASC);
+
+-- Composite index for the login lookup.
+-- idx_users_auth only holds verified accounts and covers the login columns
+CREATE INDEX IF NOT EXISTS idx_users_auth ON users(username, password, role) WHERE is_verified = 1;
+
+-- User-facing lookups: share links, per-user history, calendars.
+-- Every view_resources filter walks idx_resources_status_epoch newest first; listings
+-- sort on the integer *_epoch keys (see EPOCH_KEYS) rather than the date text.
+-- idx_reviews_resource_rating covers the per-resource AVG(rating) aggregates
+CREATE INDEX IF NOT EXISTS idx_resources_share_link ON resources(share_link);
+CREATE INDEX IF NOT EXISTS idx_reviews_resource_rating ON reviews(resource_id, rating);
+CREATE INDEX IF NOT EXISTS idx_user_interactions_user ON user_interactions(user_id, resource_id);
+CREATE INDEX IF NOT EXISTS idx_calendar_user_start_epoch ON calendar_events(user_id, start_epoch);
+CREATE INDEX IF NOT EXISTS idx_group_members_member ON group_members(member_username, is_active);
+
+-- Dashboard counters, maintained by triggers created in init_db()
+CREATE TABLE IF NOT EXISTS stats (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+
+-- Resource list pages: one row per resource with its review aggregates, kept in
+-- step with resources and reviews by the triggers below
+CREATE TABLE IF NOT EXISTS resource_overview (
+    resource_id INTEGER PRIMARY KEY,
+    title TEXT,
+    category_name TEXT,
+    uploaded_by TEXT,
+    status TEXT,
+    upload_date TEXT,
+    download_count INTEGER DEFAULT 0,
+    avg_rating REAL DEFAULT 0,
+    review_count INTEGER DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_resource_overview_popular ON resource_overview(status, download_count DESC);
+CREATE INDEX IF NOT EXISTS idx_resource_overview_category ON resource_overview(status, category_name, avg_rating DESC);
+
+CREATE TRIGGER IF NOT EXISTS trg_overview_resources_insert AFTER INSERT ON resources
+BEGIN
+    INSERT INTO resource_overview (resource_id, title, category_name, uploaded_by, status, upload_date, download_count)
+    VALUES (NEW.id, NEW.title, NEW.category_name, NEW.uploaded_by, NEW.status, NEW.upload_date,
+            coalesce(NEW.download_count, 0));
+END;
+CREATE TRIGGER IF NOT EXISTS trg_overview_resources_update
+AFTER UPDATE OF title, category_name, uploaded_by, status, upload_date, download_count ON resources
+BEGIN
+    UPDATE resource_overview
+    SET title = NEW.title, category_name = NEW.category_name, uploaded_by = NEW.uploaded_by,
+        status = NEW.status, upload_date = NEW.upload_date, download_count = coalesce(NEW.download_count, 0)
+    WHERE resource_id = NEW.id;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_overview_resources_delete AFTER DELETE ON resources
+BEGIN
+    DELETE FROM resource_overview WHERE resource_id = OLD.id;
+END;
+
+-- Review triggers recount the one affected resource through idx_reviews_resource_rating
+CREATE TRIGGER IF NOT EXISTS trg_overview_reviews_insert AFTER INSERT ON reviews
+BEGIN
+    UPDATE resource_overview
+    SET avg_rating = (SELECT coalesce(AVG(rating), 0) FROM reviews WHERE resource_id = NEW.resource_id),
+        review_count = review_count + 1
+    WHERE resource_id = NEW.resource_id;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_overview_reviews_update AFTER UPDATE OF rating, resource_id ON reviews
+BEGIN
+    UPDATE resource_overview
+    SET avg_rating = (SELECT coalesce(AVG(rating), 0) FROM reviews WHERE resource_id = resource_overview.resource_id),
+        review_count = (SELECT COUNT(*) FROM reviews WHERE resource_id = resource_overview.resource_id)
+    WHERE resource_id IN (OLD.resource_id, NEW.resource_id);
+END;
+CREATE TRIGGER IF NOT EXISTS trg_overview_reviews_delete AFTER DELETE ON reviews
+BEGIN
+    UPDATE resource_overview
+    SET avg_rating = (SELECT coalesce(AVG(rating), 0) FROM reviews WHERE resource_id = OLD.resource_id),
+        review_count = review_count - 1
+    WHERE resource_id = OLD.resource_id;
+END;
+
+-- Full-text index over resource titles and descriptions. External content: the text
+-- stays in resources and these triggers keep the index in step with it
+CREATE VIRTUAL TABLE IF NOT EXISTS resources_fts USING fts5(
+    title, description, content='resources', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS trg_resources_fts_insert AFTER INSERT ON resources
+BEGIN
+    INSERT INTO resources_fts (rowid, title, description) VALUES (NEW.id, NEW.title, NEW.description);
+END;
+CREATE TRIGGER IF NOT EXISTS trg_resources_fts_delete AFTER DELETE ON resources
+BEGIN
+    INSERT INTO resources_fts (resources_fts, rowid, title, description)
+    VALUES ('delete', OLD.id, OLD.title, OLD.description);
+END;
+CREATE TRIGGER IF NOT EXISTS trg_resources_fts_update AFTER UPDATE OF title, description ON resources
+BEGIN
+    INSERT INTO resources_fts (resources_fts, rowid, title, description)
+    VALUES ('delete', OLD.id, OLD.title, OLD.description);
+    INSERT INTO resources_fts (rowid, title, description) VALUES (NEW.id, NEW.title, NEW.description);
+END;
+"""
+
+# Link tables keyed only by their composite PRIMARY KEY. Stored WITHOUT ROWID the key
+# is the table's own B-tree, rather than a second index pointing back at a rowid
+WITHOUT_ROWID_TABLES = ("favorites", "group_members")
+
+# (table, source column, stored lowercase key) for case-insensitive lookups
+LOWERCASE_KEYS = [
+    ("users", "username", "username_lower"),
+    ("categories", "name", "name_lower"),
+]
+
+# (table, local date text column, stored Unix epoch key). Listings order by the integer
+# key; the text stays the display value. Inserts made by the app write both, and
+# triggers fill the key for any other writer
+EPOCH_KEYS = [
+    ("resources", "upload_date", "upload_epoch"),
+    ("calendar_events", "start_datetime", "start_epoch"),
+    ("calendar_events", "end_datetime", "end_epoch"),
+]
+
+# Dashboard counters kept in the stats table: table -> (columns watched by the
+# UPDATE trigger, {stat key: predicate over a row}). "{row}" is NEW/OLD in the
+# triggers and the table name when recounting.
+STAT_COUNTERS = {
+    "users": ("role, is_verified", {
+        "users_total": "coalesce({row}.role, 'user') = 'user'",
+        "users_verified": "coalesce({row}.role, 'user') = 'user' AND {row}.is_verified IS 1",
+        "users_pending": "coalesce({row}.role, 'user') = 'user' AND {row}.is_verified IS 0",
+    }),
+    "resources": ("status", {
+        "resources_total": "1",
+        "resources_approved": "{row}.status IS 'approved'",
+        "resources_pending": "{row}.status IS 'pending'",
+        "resources_rejected": "{row}.status IS 'rejected'",
+    }),
+    "categories": ("is_active", {
+        "categories_total": "1",
+        "categories_active": "{row}.is_active IS 1",
+        "categories_inactive": "{row}.is_active IS 0",
+    }),
+}
+
+
+def _stat_delta(counters, rows):
+    """Build a CASE expression giving each stat key's change for the given (sign, row) pairs."""
+    whens = " ".join(
+        f"WHEN '{key}' THEN " + " ".join(f"{sign} ({pred.format(row=row)})" for sign, row in rows)
+        for key, pred in counters.items())
+    return f"CASE key {whens} END"
+
+
+def _create_stat_triggers(c):
+    """Create the triggers that keep the stats table in step with its source tables."""
+    for table, (watched, counters) in STAT_COUNTERS.items():
+        keys = ", ".join(f"'{key}'" for key in counters)
+        for event, rows in [("INSERT", [("+", "NEW")]),
+                            ("DELETE", [("-", "OLD")]),
+                            (f"UPDATE OF {watched}", [("+", "NEW"), ("-", "OLD")])]:
+            c.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_stats_{table}_{event.split()[0].lower()}
+                          AFTER {event} ON {table}
+                          BEGIN UPDATE stats SET value = value + {_stat_delta(counters, rows)}
+                                WHERE key IN ({keys}); END""")
+
+
+def recompute_stats(conn):
+    """Recount every stats key from its source table, healing any drift."""
+    for table, (_, counters) in STAT_COUNTERS.items():
+        counts = ", ".join(f"COUNT(CASE WHEN {pred.format(row=table)} THEN 1 END)"
+                           for pred in counters.values())
+        values = conn.execute(f"SELECT {counts} FROM {table}").fetchone()
+        conn.executemany("INSERT OR REPLACE INTO stats (key, value) VALUES (?, ?)",
+                         zip(counters, values))
+
+
+def refresh_resource_overview(conn):
+    """Rebuild resource_overview from resources and reviews."""
+    conn.execute("DELETE FROM resource_overview")
+    conn.execute("""INSERT INTO resource_overview
+                        (resource_id, title, category_name, uploaded_by, status, upload_date,
+                         download_count, avg_rating, review_count)
+                    SELECT r.id, r.title, r.category_name, r.uploaded_by, r.status, r.upload_date,
+                           coalesce(r.download_count, 0), coalesce(AVG(rev.rating), 0), COUNT(rev.id)
+                    FROM resources r
+                    LEFT JOIN reviews rev ON r.id = rev.resource_id
+                    GROUP BY r.id""")
+
+
+@functools.lru_cache(maxsize=None)
+def schema_columns():
+    """Return {table: {column: ADD COLUMN definition}} for every table in _SCHEMA_SQL.
+
+    Built once from an in-memory copy of the schema, so older databases are
+    diffed against the same DDL that creates new ones.
+    """
+    mem = sqlite3.connect(":memory:")
+    try:
+        mem.executescript(_SCHEMA_SQL)
+        tables = [row[0] for row in mem.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")]
+        columns = {}
+        for table in tables:
+            columns[table] = {}
+            for _, name, col_type, notnull, default, _ in mem.execute(f"PRAGMA table_info({table})"):
+                definition = col_type
+                # ALTER TABLE ADD COLUMN only accepts literal defaults, and NOT NULL needs one
+                if default is not None and (default[0] == "'" or default.lstrip("-").isdigit()):
+                    definition += f"{' NOT NULL' if notnull else ''} DEFAULT {default}"
+                columns[table][name] = definition
+        return columns
+    finally:
+        mem.close()
+
+
+def add_missing_columns(c):
+    """Add the schema columns an existing database is missing; returns the (table, column) pairs added."""
+    added = []
+    for table, columns in schema_columns().items():
+        existing = {row[1] for row in c.execute(f"PRAGMA table_info({table})")}
+        if not existing:
+            continue
+        for name, definition in columns.items():
+            if name not in existing:
+                c.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+                logging.info(f"Added column {table}.{name}")
+                added.append((table, name))
+    return added
+
+
+def _convert_to_without_rowid(c):
+    """Rebuild any WITHOUT_ROWID_TABLES that an older database still stores with a rowid."""
+    for table in WITHOUT_ROWID_TABLES:
+        sql = c.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?",
+                        (table,)).fetchone()[0]
+        if sql.rstrip().upper().endswith("WITHOUT ROWID"):
+            continue
+        # The rename carries the table's indexes and triggers over to {table}_old, which is
+        # dropped below, so their definitions are read first and recreated on the new table
+        dependents = [row[0] for row in c.execute(
+            "SELECT sql FROM sqlite_master WHERE type IN ('index', 'trigger') AND tbl_name = ? AND sql IS NOT NULL",
+            (table,))]
+        columns = ", ".join(row[1] for row in c.execute(f"PRAGMA table_info({table})"))
+        c.execute(f"ALTER TABLE {table} RENAME TO {table}_old")
+        c.execute(f"{sql} WITHOUT ROWID")
+        # Rows with a NULL key part cannot be stored WITHOUT ROWID and are dropped
+        c.execute(f"INSERT OR IGNORE INTO {table} ({columns}) SELECT {columns} FROM {table}_old")
+        c.execute(f"DROP TABLE {table}_old")
+        for dependent in dependents:
+            c.execute(dependent)
+        logging.info(f"Rebuilt {table} as a WITHOUT ROWID table")
+
+
+def _create_lowercase_key_index(c, table, column, key):
+    """Index a lowercase key as unique, or as a plain index while case-variant duplicates exist.
+
+    Older schemas allowed names differing only in case (e.g. 'Alice' and 'alice'),
+    which a unique index would reject and abort startup over. Those rows are
+    reported instead, and the index is made unique on the first start after they
+    have been resolved.
+    """
+    index = f"idx_{table}_{key}"
+    unique = {row[1]: row[2] for row in c.execute(f"PRAGMA index_list({table})")}.get(index)
+    if unique == 1:
+        return
+    duplicates = c.execute(f"""SELECT group_concat({column}, ', ') FROM {table}
+                               WHERE {key} IS NOT NULL GROUP BY {key} HAVING COUNT(*) > 1""").fetchall()
+    if duplicates:
+        for (names,) in duplicates:
+            print(f"⚠️  {table}.{column} values differ only in letter case: {names}")
+            logging.warning(f"Case-variant duplicates in {table}.{column}: {names}")
+        print(f"⚠️  Case-insensitive {table} lookups may pick either of these until all but one are renamed")
+        c.execute(f"CREATE INDEX IF NOT EXISTS {index} ON {table}({key})")
+        return
+    if unique == 0:
+        c.execute(f"DROP INDEX {index}")
+    c.execute(f"CREATE UNIQUE INDEX {index} ON {table}({key})")
+
+
+def _remove_duplicate_reviews(c):
+    """Delete all but the latest review of each (resource_id, reviewer) pair, reporting what went."""
+    c.execute("""CREATE TEMP TABLE superseded_reviews AS
+                 SELECT id, resource_id, reviewer FROM (
+                     SELECT id, resource_id, reviewer,
+                            ROW_NUMBER() OVER (PARTITION BY resource_id, reviewer
+                                               ORDER BY review_date DESC, id DESC) AS newest
+                     FROM reviews)
+                 WHERE newest > 1""")
+    pairs = c.execute("""SELECT resource_id, reviewer, COUNT(*) FROM superseded_reviews
+                         GROUP BY resource_id, reviewer ORDER BY resource_id, reviewer""").fetchall()
+    if pairs:
+        removed = c.execute("DELETE FROM reviews WHERE id IN (SELECT id FROM superseded_reviews)").rowcount
+        print(f"⚠️  Removed {removed} older duplicate reviews; each user keeps their latest review per resource")
+        logging.warning(f"Removed {removed} duplicate reviews before adding idx_reviews_unique")
+        for resource_id, reviewer, count in pairs:
+            logging.warning(f"Removed {count} older review(s) by '{reviewer}' on resource {resource_id}")
+    c.execute("DROP TABLE superseded_reviews")
+
+
+def hash_password(password):
+    """Hash a password with the configured scheme."""
+    if PASSWORD_HASHER == "argon2id" and _argon2 is not None:
+        return _argon2.hash(password)
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(BCRYPT_COST)).decode('utf-8')
 
-def get_connection():
-    """Create a new SQLite connection with foreign keys enabled."""
-    conn = sqlite3.connect(DB_FILE, timeout=30.0)
-    conn.execute("PRAGMA foreign_keys = ON;")
-    return conn
+
+def check_password(password, stored_hash):
+    """Check a password against a bcrypt or Argon2id hash, dispatching on its prefix."""
+    if stored_hash.startswith("$argon2id$"):
+        if _argon2 is None:
+            logging.error("Argon2id password hash found but argon2-cffi is not installed")
+            return False
+        try:
+            return _argon2.verify(stored_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+    return bcrypt.checkpw(password.encode('utf-8'), stored_hash.encode('utf-8'))
+
+
+@contextmanager
+def get_connection(write=False):
+    """Check out a pooled connection: the writer for mutations, a reader otherwise.
+
+    The writer runs in autocommit mode; multi-statement writes open their own
+    BEGIN IMMEDIATE and commit.
+    """
+    conn = pool.get(write=write)
+    try:
+        yield conn
+    finally:
+        pool.put(conn)
 
 
 def init_db():
@@ -33,245 +640,117 @@ def init_db():
         exit(1)
 
     try:
-        conn = get_connection()
-        c = conn.cursor()
-
-        # Users table
-        c.execute('''CREATE TABLE IF NOT EXISTS users (
-            username TEXT PRIMARY KEY,
-            password TEXT NOT NULL,
-            role TEXT DEFAULT 'user',
-            is_verified INTEGER DEFAULT 0,
-            full_name TEXT,
-            email TEXT,
-            user_type TEXT DEFAULT 'student',
-            join_date TEXT DEFAULT (datetime('now')),
-            last_active TEXT,
-            study_streak INTEGER DEFAULT 0,
-            total_study_hours INTEGER DEFAULT 0
-        )''')
-
-        # Categories
-        c.execute('''CREATE TABLE IF NOT EXISTS categories (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT UNIQUE,
-            description TEXT,
-            color TEXT,
-            created_by TEXT,
-            created_date TEXT DEFAULT (datetime('now')),
-            is_active INTEGER DEFAULT 1,
-            FOREIGN KEY (created_by) REFERENCES users(username) ON DELETE SET NULL
-        )''')
-
-        # Resources
-        c.execute('''CREATE TABLE IF NOT EXISTS resources (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT,
-            description TEXT,
-            category_name TEXT,
-            uploaded_by TEXT,
-            file_path TEXT,
-            file_type TEXT,
-            upload_date TEXT DEFAULT (datetime('now')),
-            status TEXT DEFAULT 'pending',
-            download_count INTEGER DEFAULT 0,
-            file_size INTEGER,
-            tags TEXT,
-            is_video INTEGER DEFAULT 0,
-            video_duration TEXT,
-            share_link TEXT,
-            difficulty_level TEXT,
-            estimated_time TEXT,
-            FOREIGN KEY (category_name) REFERENCES categories(name) ON DELETE SET NULL,
-            FOREIGN KEY (uploaded_by) REFERENCES users(username) ON DELETE CASCADE
-        )''')
-
-        # Reviews
-        c.execute('''CREATE TABLE IF NOT EXISTS reviews (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            resource_id INTEGER,
-            reviewer TEXT,
-            rating INTEGER,
-            comment TEXT,
-            review_date TEXT DEFAULT (datetime('now')),
-            helpfulness INTEGER DEFAULT 0,
-            FOREIGN KEY (resource_id) REFERENCES resources(id) ON DELETE CASCADE,
-            FOREIGN KEY (reviewer) REFERENCES users(username) ON DELETE CASCADE
-        )''')
-
-        # Favorites
-        c.execute('''CREATE TABLE IF NOT EXISTS favorites (
-            user_id TEXT,
-            resource_id INTEGER,
-            added_date TEXT DEFAULT (datetime('now')),
-            PRIMARY KEY (user_id, resource_id),
-            FOREIGN KEY (user_id) REFERENCES users(username) ON DELETE CASCADE,
-            FOREIGN KEY (resource_id) REFERENCES resources(id) ON DELETE CASCADE
-        )''')
-
-        # Study groups
-        c.execute('''CREATE TABLE IF NOT EXISTS study_groups (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT,
-            description TEXT,
-            subject TEXT,
-            created_by TEXT,
-            created_date TEXT DEFAULT (datetime('now')),
-            max_members INTEGER DEFAULT 20,
-            is_private INTEGER DEFAULT 0,
-            meeting_schedule TEXT,
-            group_code TEXT UNIQUE,
-            FOREIGN KEY (created_by) REFERENCES users(username) ON DELETE SET NULL
-        )''')
-
-        # Group members
-        c.execute('''CREATE TABLE IF NOT EXISTS group_members (
-            group_id INTEGER,
-            member_username TEXT,
-            join_date TEXT DEFAULT (datetime('now')),
-            role TEXT DEFAULT 'member',
-            is_active INTEGER DEFAULT 1,
-            contribution_score INTEGER DEFAULT 0,
-            PRIMARY KEY (group_id, member_username),
-            FOREIGN KEY (group_id) REFERENCES study_groups(id) ON DELETE CASCADE,
-            FOREIGN KEY (member_username) REFERENCES users(username) ON DELETE CASCADE
-        )''')
-
-        # Messages
-        c.execute('''CREATE TABLE IF NOT EXISTS messages (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            sender TEXT,
-            recipient TEXT,
-            subject TEXT,
-            message TEXT,
-            sent_date TEXT DEFAULT (datetime('now')),
-            is_read INTEGER DEFAULT 0,
-            message_type TEXT DEFAULT 'direct',
-            group_id INTEGER DEFAULT NULL,
-            FOREIGN KEY (sender) REFERENCES users(username) ON DELETE CASCADE,
-            FOREIGN KEY (recipient) REFERENCES users(username) ON DELETE CASCADE,
-            FOREIGN KEY (group_id) REFERENCES study_groups(id) ON DELETE SET NULL
-        )''')
-
-        # Notifications
-        c.execute('''CREATE TABLE IF NOT EXISTS notifications (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id TEXT,
-            message TEXT,
-            notification_type TEXT,
-            is_read INTEGER DEFAULT 0,
-            created_date TEXT DEFAULT (datetime('now')),
-            related_id INTEGER,
-            action_url TEXT,
-            FOREIGN KEY (user_id) REFERENCES users(username) ON DELETE CASCADE
-        )''')
-
-        # Download history
-        c.execute('''CREATE TABLE IF NOT EXISTS download_history (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id TEXT,
-            resource_id INTEGER,
-            download_date TEXT DEFAULT (datetime('now')),
-            source TEXT DEFAULT 'direct',
-            FOREIGN KEY (user_id) REFERENCES users(username) ON DELETE CASCADE,
-            FOREIGN KEY (resource_id) REFERENCES resources(id) ON DELETE CASCADE
-        )''')
-
-        # Study sessions
-        c.execute('''CREATE TABLE IF NOT EXISTS study_sessions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id TEXT,
-            resource_id INTEGER,
-            start_time TEXT,
-            end_time TEXT,
-            duration_minutes INTEGER,
-            progress_percentage INTEGER,
-            session_type TEXT,
-            notes TEXT,
-            FOREIGN KEY (user_id) REFERENCES users(username) ON DELETE CASCADE,
-            FOREIGN KEY (resource_id) REFERENCES resources(id) ON DELETE CASCADE
-        )''')
-
-        # Calendar events
-        c.execute('''CREATE TABLE IF NOT EXISTS calendar_events (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id TEXT,
-            title TEXT,
-            description TEXT,
-            start_datetime TEXT,
-            end_datetime TEXT,
-            event_type TEXT,
-            related_id INTEGER,
-            reminder_minutes INTEGER DEFAULT 15,
-            is_completed INTEGER DEFAULT 0,
-            FOREIGN KEY (user_id) REFERENCES users(username) ON DELETE CASCADE
-        )''')
-
-        # Learning progress
-        c.execute('''CREATE TABLE IF NOT EXISTS learning_progress (
-            user_id TEXT,
-            category_name TEXT,
-            total_resources INTEGER,
-            completed_resources INTEGER,
-            total_time_minutes INTEGER,
-            last_updated TEXT DEFAULT (datetime('now')),
-            PRIMARY KEY (user_id, category_name),
-            FOREIGN KEY (user_id) REFERENCES users(username) ON DELETE CASCADE
-        )''')
-
-        # User interactions
-        c.execute('''CREATE TABLE IF NOT EXISTS user_interactions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id TEXT,
-            resource_id INTEGER,
-            interaction_type TEXT,
-            interaction_date TEXT DEFAULT (datetime('now')),
-            interaction_value INTEGER DEFAULT 1,
-            FOREIGN KEY (user_id) REFERENCES users(username) ON DELETE CASCADE,
-            FOREIGN KEY (resource_id) REFERENCES resources(id) ON DELETE CASCADE
-        )''')
-
-        # Indexes
-        c.execute("CREATE INDEX IF NOT EXISTS idx_users_username ON users(username)")
-        c.execute("CREATE INDEX IF NOT EXISTS idx_resources_category ON resources(category_name)")
-        c.execute("CREATE INDEX IF NOT EXISTS idx_resources_uploaded_by ON resources(uploaded_by)")
-        c.execute("CREATE INDEX IF NOT EXISTS idx_reviews_resource_id ON reviews(resource_id)")
-        c.execute("CREATE INDEX IF NOT EXISTS idx_favorites_user_id ON favorites(user_id)")
-
-        # Insert default admin
-        c.execute("SELECT * FROM users WHERE username = ?", ("admin",))
-        if c.fetchone() is None:
-            admin_password = bcrypt.hashpw("admin123".encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-            c.execute(
-                "INSERT INTO users (username, password, role, is_verified, user_type, join_date) VALUES (?, ?, ?, ?, ?, ?)",
-                ("admin", admin_password, "admin", 1, "admin",
-                 datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-            )
-            print("✅ Default admin account created (username: admin, password: admin123)")
-            logging.info("Default admin account created")
+        with get_connection(write=True) as conn:
+            c = conn.cursor()
+
+            # Older databases get any missing columns first, so the schema's indexes can use them
+            add_missing_columns(c)
 
-        conn.commit()
+            has_fts = c.execute("SELECT 1 FROM sqlite_master WHERE name = 'resources_fts'").fetchone()
+
+            # All DDL goes through one script; the transaction it opens stays open for the
+            # trigger and seed steps below and is committed at the end
+            conn.executescript("BEGIN IMMEDIATE;\n" + _SCHEMA_SQL)
+
+            # A newly created full-text index is filled from the existing resources
+            if not has_fts:
+                c.execute("INSERT INTO resources_fts (resources_fts) VALUES ('rebuild')")
+
+            # Case-insensitive lookups go through stored lowercase keys kept in sync by triggers
+            _convert_to_without_rowid(c)
+            for table, column, key in LOWERCASE_KEYS:
+                c.execute(f"UPDATE {table} SET {key} = lower({column}) WHERE {key} IS NULL")
+                c.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_{key}_insert AFTER INSERT ON {table}
+                              BEGIN UPDATE {table} SET {key} = lower(NEW.{column}) WHERE rowid = NEW.rowid; END""")
+                c.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_{key}_update AFTER UPDATE OF {column} ON {table}
+                              BEGIN UPDATE {table} SET {key} = lower(NEW.{column}) WHERE rowid = NEW.rowid; END""")
+                _create_lowercase_key_index(c, table, column, key)
+            for table, column, key in EPOCH_KEYS:
+                epoch = f"CAST(strftime('%s', {{row}}{column}, 'utc') AS INTEGER)"
+                c.execute(f"UPDATE {table} SET {key} = {epoch.format(row='')} WHERE {key} IS NULL AND {column} IS NOT NULL")
+                c.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_{key}_insert AFTER INSERT ON {table}
+                              WHEN NEW.{key} IS NULL
+                              BEGIN UPDATE {table} SET {key} = {epoch.format(row='NEW.')} WHERE rowid = NEW.rowid; END""")
+                c.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_{key}_update AFTER UPDATE OF {column} ON {table}
+                              BEGIN UPDATE {table} SET {key} = {epoch.format(row='NEW.')} WHERE rowid = NEW.rowid; END""")
+            # resources.category_id mirrors category_name as the integer key that filters and
+            # groupings compare; category_name stays for display and its foreign key
+            category_id = "(SELECT id FROM categories WHERE name = {row}category_name)"
+            c.execute(f"""UPDATE resources SET category_id = {category_id.format(row='resources.')}
+                          WHERE category_id IS NULL AND category_name IS NOT NULL""")
+            c.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_resources_category_id_insert AFTER INSERT ON resources
+                          WHEN NEW.category_id IS NULL AND NEW.category_name IS NOT NULL
+                          BEGIN UPDATE resources SET category_id = {category_id.format(row='NEW.')} WHERE id = NEW.id; END""")
+            c.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_resources_category_id_update AFTER UPDATE OF category_name ON resources
+                          BEGIN UPDATE resources SET category_id = {category_id.format(row='NEW.')} WHERE id = NEW.id; END""")
+            # Superseded by the *_epoch and category_id indexes, or by view_resources filtering
+            # while it walks idx_resources_status_epoch
+            for index in ("idx_resources_status_date", "idx_resources_cat_status", "idx_resources_browse", "idx_resources_status_video",
+                          "idx_resources_status_diff", "idx_calendar_user_start", "idx_resources_browse_epoch",
+                          "idx_resources_video_epoch", "idx_resources_diff_epoch"):
+                c.execute(f"DROP INDEX IF EXISTS {index}")
+            c.execute("DROP INDEX IF EXISTS idx_users_username_nocase")
+            # Duplicates the PRIMARY KEY's own index on users(username)
+            c.execute("DROP INDEX IF EXISTS idx_users_username")
+            # Covered by the leading user_id column of the favorites PRIMARY KEY
+            c.execute("DROP INDEX IF EXISTS idx_favorites_user_id")
+            # Replaced by idx_reviews_resource_rating, which also covers the rating
+            c.execute("DROP INDEX IF EXISTS idx_reviews_resource_id")
+            # One review per user and resource, enforced by the database so rate_resource can
+            # insert with ON CONFLICT; older databases keep each user's latest review
+            if c.execute("SELECT 1 FROM sqlite_master WHERE name = 'idx_reviews_unique'").fetchone() is None:
+                _remove_duplicate_reviews(c)
+                c.execute("CREATE UNIQUE INDEX idx_reviews_unique ON reviews(resource_id, reviewer)")
+
+            # Dashboard counters maintained by triggers; seeded by a full recount the first time
+            _create_stat_triggers(c)
+            expected = sum(len(counters) for _, counters in STAT_COUNTERS.values())
+            if c.execute("SELECT COUNT(*) FROM stats").fetchone()[0] < expected:
+                recompute_stats(c)
+            # Databases from before resource_overview existed are backfilled once
+            if c.execute("""SELECT (SELECT COUNT(*) FROM resources)
+                                   != (SELECT COUNT(*) FROM resource_overview)""").fetchone()[0]:
+                refresh_resource_overview(c)
+            # A database that has never been analyzed gets full statistics once so the
+            # planner can choose between the composite indexes; after that optimize suffices
+            if c.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone() is None:
+                c.execute("ANALYZE")
+            c.execute("PRAGMA optimize")
+
+            # Insert default admin. With ADMIN_PW_HASH set this is a single statement;
+            # otherwise the password is only hashed when the account is missing
+            if ADMIN_PW_HASH:
+                admin_password = ADMIN_PW_HASH
+            elif c.execute("SELECT EXISTS (SELECT 1 FROM users WHERE username = 'admin')").fetchone()[0]:
+                admin_password = None
+            else:
+                admin_password = hash_password("admin123")
+            if admin_password is not None:
+                c.execute(SQL_SEED_ADMIN, (admin_password,))
+                if c.rowcount:
+                    if ADMIN_PW_HASH:
+                        print("✅ Default admin account created (username: admin, password from ADMIN_PW_HASH)")
+                    else:
+                        print("✅ Default admin account created (username: admin, password: admin123)")
+                    logging.info("Default admin account created")
+
+            conn.commit()
     except sqlite3.Error as e:
         print(f"❌ Database initialization failed: {e}")
         logging.error(f"Database initialization failed: {e}")
         exit(1)
-    finally:
-        conn.close()
 
 
 def add_user(username, password, role="user", full_name=None, email=None, user_type="student"):
     """Add a new user to the database with a hashed password."""
-    conn = get_connection()
-    c = conn.cursor()
+    # Hash before checking out the writer so hashing never holds the write lock
+    hashed_password = hash_password(password)
     try:
-        hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-        c.execute(
-            "INSERT INTO users (username, password, role, is_verified, full_name, email, user_type, join_date) "
-            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-            (username, hashed_password, role, 0, full_name, email, user_type,
-             datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-        )
-        conn.commit()
+        with get_connection(write=True) as conn:
+            conn.execute(
+                SQL_INSERT_USER,
+                (username, hashed_password, role, 0, full_name, email, user_type)
+            )
         logging.info(f"User '{username}' added with role '{role}' and user_type '{user_type}'")
         return True
     except sqlite3.IntegrityError:
@@ -280,21 +759,180 @@ def add_user(username, password, role="user", full_name=None, email=None, user_t
     except sqlite3.Error as e:
         logging.error(f"Database error in add_user for '{username}': {e}")
         return False
-    finally:
-        conn.close()
+
+
+def add_users_bulk(rows):
+    """Add many users in one transaction; returns how many were inserted.
+
+    rows are (username, password, role, full_name, email, user_type) tuples.
+    Usernames that already exist are skipped.
+    """
+    rows = list(rows)
+    # Passwords are hashed in parallel on the hashing pool before the writer is taken
+    hashed = _HASH_POOL.map(hash_password, [row[1] for row in rows])
+    params = [(username, hashed_password, role, 0, full_name, email, user_type)
+              for (username, _, role, full_name, email, user_type), hashed_password in zip(rows, hashed)]
+    try:
+        with get_connection(write=True) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            inserted = conn.executemany(SQL_INSERT_USERS_BULK, params).rowcount
+            conn.commit()
+        logging.info(f"Bulk-added {inserted} of {len(params)} users")
+        return inserted
+    except sqlite3.Error as e:
+        logging.error(f"Database error in add_users_bulk for {len(params)} users: {e}")
+        return 0
+
+
+def _record_last_active(username):
+    """Buffer a login's last_active stamp; a timer writes the buffer in one batch."""
+    global _last_active_timer
+    with _last_active_lock:
+        _last_active_buffer[username] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        _arm_last_active_timer()
+
+
+def _arm_last_active_timer():
+    """Start the flush timer unless one is already pending; call with _last_active_lock held."""
+    global _last_active_timer
+    if _last_active_timer is None:
+        _last_active_timer = threading.Timer(LAST_ACTIVE_FLUSH_INTERVAL, flush_last_active)
+        _last_active_timer.daemon = True
+        _last_active_timer.start()
+
+
+def flush_last_active():
+    """Write all buffered last_active stamps in a single transaction.
+
+    If the write fails the stamps go back into the buffer, where a newer stamp
+    recorded in the meantime wins, and the timer is re-armed to try again.
+    """
+    global _last_active_timer
+    with _last_active_lock:
+        pending = [(stamp, username) for username, stamp in _last_active_buffer.items()]
+        _last_active_buffer.clear()
+        _last_active_timer = None
+    if not pending:
+        return
+    try:
+        with get_connection(write=True) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(SQL_UPDATE_LAST_ACTIVE, pending)
+            conn.commit()
+    except sqlite3.Error as e:
+        logging.error(f"Database error flushing last_active for {len(pending)} users: {e}")
+        with _last_active_lock:
+            for stamp, username in pending:
+                # Stamps share one fixed-width format, so they compare as strings
+                if stamp > _last_active_buffer.get(username, ""):
+                    _last_active_buffer[username] = stamp
+            _arm_last_active_timer()
+
+
+# Registered after pool.close_all, so it runs before the pool is closed at exit
+atexit.register(flush_last_active)
+
+
+def queue_write(statements, on_commit=None):
+    """Queue (sql, params) statements to be committed together in the background.
+
+    Returns immediately. The statements of one call always share a transaction;
+    on_commit, if given, is called on the writer thread once they are committed.
+    Failures are logged, since the caller has moved on by then.
+    """
+    global _write_thread
+    with _write_thread_lock:
+        if _write_thread is None:
+            _write_thread = threading.Thread(target=_write_loop, name="db-writer", daemon=True)
+            _write_thread.start()
+    _write_queue.put((list(statements), on_commit))
+
+
+def _write_loop():
+    last_checkpoint = time.monotonic()
+    while True:
+        batch = [_write_queue.get()]
+        deadline = time.monotonic() + WRITE_BATCH_WAIT
+        while len(batch) < WRITE_BATCH_SIZE:
+            try:
+                batch.append(_write_queue.get(timeout=max(deadline - time.monotonic(), 0)))
+            except queue.Empty:
+                break
+        try:
+            _commit_writes(batch)
+            if (pool.use_wal and _write_queue.empty()
+                    and time.monotonic() - last_checkpoint >= WAL_CHECKPOINT_INTERVAL):
+                _checkpoint_wal()
+                last_checkpoint = time.monotonic()
+        finally:
+            for _ in batch:
+                _write_queue.task_done()
+
+
+def _checkpoint_wal():
+    """Copy committed WAL pages back into the database without waiting on readers."""
+    try:
+        with get_connection(write=True) as conn:
+            conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+    except sqlite3.Error as e:
+        logging.error(f"Database error checkpointing the WAL: {e}")
+
+
+def _commit_writes(batch):
+    """Commit a batch of queued groups in one transaction, or group by group if that fails."""
+    try:
+        with get_connection(write=True) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # Consecutive statements with the same SQL (e.g. a burst of notifications)
+            # are bound and stepped in one executemany call
+            statements = itertools.chain.from_iterable(group for group, _ in batch)
+            for sql, run in itertools.groupby(statements, key=lambda stmt: stmt[0]):
+                conn.executemany(sql, [params for _, params in run])
+            conn.commit()
+    except sqlite3.Error as e:
+        if len(batch) == 1:
+            logging.error(f"Database error in queued write: {e}")
+            return
+        # One bad group must not take the rest of the batch with it
+        for group in batch:
+            _commit_writes([group])
+        return
+    for _, on_commit in batch:
+        if on_commit is not None:
+            try:
+                on_commit()
+            except Exception as e:
+                logging.error(f"Error in queued write callback: {e}")
+
+
+def flush_writes():
+    """Block until every queued write has been committed (or has failed)."""
+    if _write_thread is not None:
+        _write_queue.join()
+
+
+# Registered after pool.close_all, so queued writes land before the pool is closed at exit
+atexit.register(flush_writes)
+
+
+@functools.lru_cache(maxsize=1024)
+def _fetch_user_auth(username):
+    """Return (password_hash, role) for a verified user, or None."""
+    with get_connection() as conn:
+        row = conn.execute(SQL_USER_AUTH, (username,)).fetchone()
+    return tuple(row) if row else None
 
 
 def validate_user(username, password):
     """Validate user credentials and check if the account is verified."""
-    conn = get_connection()
-    c = conn.cursor()
     try:
-        c.execute("SELECT password, role FROM users WHERE username=? AND is_verified=1", (username,))
-        result = c.fetchone()
-        if result and bcrypt.checkpw(password.encode('utf-8'), result[0].encode('utf-8')):
-            c.execute("UPDATE users SET last_active = ? WHERE username = ?",
-                      (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), username))
-            conn.commit()
+        # Cached credential rows are dropped whenever any other connection has written
+        with get_connection() as conn:
+            if conn.data_changed("user_auth"):
+                _fetch_user_auth.cache_clear()
+        result = _fetch_user_auth(username)
+        if result and _HASH_POOL.submit(check_password, password, result[0]).result():
+            _record_last_active(username)
             logging.info(f"User '{username}' validated successfully")
             return result[1]
         logging.warning(f"User '{username}' validation failed: Invalid credentials or unverified")
@@ -302,5 +940,3 @@ def validate_user(username, password):
     except sqlite3.Error as e:
         logging.error(f"Database error in validate_user for '{username}': {e}")
         return None
-    finally:
-        conn.close()
@@ -0,0 +1,44 @@
+import threading
+
+
+class VersionedCache:
+    """Process-local memo of query results, dropped whenever the database changes.
+
+    Freshness is checked with PooledConnection.data_changed(), a single
+    PRAGMA data_version per lookup, so entries stay valid until another
+    connection commits. Pass a reader connection: SQLite does not bump
+    data_version for a connection's own writes.
+    """
+
+    def __init__(self, name, maxsize=256):
+        self.name = name
+        self.maxsize = maxsize
+        self._store = {}
+        self._lock = threading.Lock()
+
+    def get_or_set(self, conn, key, fn):
+        """Return the cached value for key, calling fn() to fill it on a miss."""
+        changed = conn.data_changed(self.name)
+        with self._lock:
+            if changed or len(self._store) >= self.maxsize:
+                self._store.clear()
+            if key in self._store:
+                return self._store[key]
+        value = fn()
+        with self._lock:
+            self._store[key] = value
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._store.clear()
+
+
+# Shared cache for stable lookup data (category lists and the like)
+query_cache = VersionedCache("query_cache")
+
+
+def cached_query(conn, sql, params=()):
+    """Run a SELECT through query_cache, keyed by its SQL text and parameters."""
+    params = tuple(params)
+    return query_cache.get_or_set(conn, (sql, params), lambda: conn.execute(sql, params).fetchall())
@@ -0,0 +1,181 @@
+import os
+import queue
+import sqlite3
+import threading
+from pathlib import Path
+
+# Memory-mapped I/O for pooled connections (256 MB)
+MMAP_SIZE = 268435456
+
+# mmap is not safe on network filesystems, so connections fall back to read() there
+NETWORK_FILESYSTEMS = {"nfs", "nfs4", "cifs", "smb3", "smbfs", "fuse.sshfs", "9p"}
+
+
+def on_network_filesystem(path):
+    """Best-effort check for whether path lives on an NFS/SMB style mount."""
+    if path.startswith("\\\\"):  # Windows UNC share
+        return True
+    path = os.path.abspath(path)
+    try:
+        with open("/proc/mounts") as f:
+            mounts = [line.split()[1:3] for line in f]
+    except OSError:
+        return False
+    mount_point, fs_type = max(
+        (m for m in mounts if path == m[0] or path.startswith(m[0].rstrip("/") + "/")),
+        key=lambda m: len(m[0]), default=("", ""))
+    return fs_type in NETWORK_FILESYSTEMS
+
+
+class PooledConnection(sqlite3.Connection):
+    """SQLite connection owned by a ConnectionPool."""
+    is_read_only = False
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._data_versions = {}
+
+    def data_changed(self, key):
+        """Return True if another connection has committed since this one last checked key.
+
+        PRAGMA data_version is tracked per connection, so callers caching query results
+        pass their own key; the first check for a key always reports a change.
+        """
+        version = self.execute("PRAGMA data_version").fetchone()[0]
+        changed = self._data_versions.get(key) != version
+        self._data_versions[key] = version
+        return changed
+
+
+class ConnectionPool:
+    """Process-wide pool of long-lived SQLite connections (one writer + N readers).
+
+    Connections are opened lazily on first checkout and configured once, so
+    callers skip the connect/PRAGMA/close cycle and keep SQLite's page cache warm.
+    Readers are opened read-only with query_only=ON, so listing code can never
+    take a write lock by accident. All connections read pages through mmap
+    where the filesystem allows it.
+    """
+
+    # Session-scoped settings for every connection
+    SESSION_PRAGMAS = """
+        PRAGMA synchronous=NORMAL;
+        PRAGMA temp_store=MEMORY;
+        PRAGMA cache_size=-64000;
+        PRAGMA busy_timeout=30000;
+        PRAGMA foreign_keys=ON;
+    """
+
+    # Writer-only settings. journal_mode=WAL persists in the database file, so setting it
+    # when the writer opens covers every entry point, not just init_db(); with WAL the
+    # readers never block the writer and the writer never blocks the readers. Skipped for
+    # in-memory databases and network filesystems, where WAL's shared memory cannot work.
+    # The automatic checkpoint, which runs inside whichever commit crosses the threshold,
+    # is only a backstop; db's background writer checkpoints when the write queue is idle
+    WRITER_PRAGMAS = """
+        PRAGMA journal_mode=WAL;
+        PRAGMA wal_autocheckpoint=10000;
+    """
+
+    def __init__(self, db_file, readers=4, timeout=30.0):
+        self.db_file = db_file
+        self.max_readers = readers
+        self.timeout = timeout
+        self._readers = queue.LifoQueue(maxsize=readers)
+        self._opened_readers = 0
+        self._open_lock = threading.Lock()
+        self._writer = None
+        self._writer_lock = threading.RLock()
+        self._writer_depth = 0
+        network = on_network_filesystem(db_file)
+        self.mmap_size = 0 if network else MMAP_SIZE
+        self.use_wal = db_file != ":memory:" and not network
+
+    def _open(self, read_only):
+        """Open and configure a new pooled connection."""
+        if read_only:
+            target = f"{Path(os.path.abspath(self.db_file)).as_uri()}?mode=ro"
+            conn = sqlite3.connect(target, uri=True, timeout=self.timeout,
+                                   check_same_thread=False, cached_statements=256,
+                                   factory=PooledConnection)
+            conn.executescript(self.SESSION_PRAGMAS + "PRAGMA query_only=ON;")
+        else:
+            # The writer runs in autocommit mode so callers control transactions with
+            # explicit BEGIN IMMEDIATE instead of the driver's implicit DEFERRED begin
+            conn = sqlite3.connect(self.db_file, timeout=self.timeout, isolation_level=None,
+                                   check_same_thread=False, cached_statements=256,
+                                   factory=PooledConnection)
+            conn.executescript(self.SESSION_PRAGMAS + (self.WRITER_PRAGMAS if self.use_wal else ""))
+        conn.execute(f"PRAGMA mmap_size={self.mmap_size}")
+        conn.is_read_only = read_only
+        # Rows support access by column name as well as by position
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def get(self, write=False, timeout=None):
+        """Check out the writer connection or a reader connection."""
+        timeout = self.timeout if timeout is None else timeout
+        if write:
+            if not self._writer_lock.acquire(timeout=timeout):
+                raise sqlite3.OperationalError("Timed out waiting for the writer connection")
+            try:
+                if self._writer is None:
+                    self._writer = self._open(read_only=False)
+            except Exception:
+                self._writer_lock.release()
+                raise
+            # The writer lock is re-entrant so nested helpers share the same connection
+            self._writer_depth += 1
+            return self._writer
+
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+        with self._open_lock:
+            if self._opened_readers < self.max_readers:
+                self._opened_readers += 1
+                open_new = True
+            else:
+                open_new = False
+        if open_new:
+            try:
+                return self._open(read_only=True)
+            except Exception:
+                with self._open_lock:
+                    self._opened_readers -= 1
+                raise
+        try:
+            return self._readers.get(timeout=timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError("Timed out waiting for a reader connection")
+
+    def put(self, conn):
+        """Return a connection to the pool, discarding any uncommitted work."""
+        if not conn.is_read_only:
+            self._writer_depth -= 1
+            try:
+                if self._writer_depth == 0 and conn.in_transaction:
+                    conn.rollback()
+            finally:
+                self._writer_lock.release()
+            return
+
+        if conn.in_transaction:
+            conn.rollback()
+        self._readers.put_nowait(conn)
+
+    def close_all(self):
+        """Close every idle connection held by the pool."""
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        while True:
+            try:
+                conn = self._readers.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._open_lock:
+                self._opened_readers -= 1
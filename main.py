@@ -1,5 +1,6 @@
 import logging
 import sqlite3
+from app_logging import setup_logging
 from db import init_db, add_user, validate_user
 from admin import enhanced_admin_menu
 from resource import upload_resource, view_resources, download_resource, share_resource_link, rate_resource, view_reviews
@@ -8,8 +9,7 @@ from study_groups import create_study_group, view_study_groups, join_study_group
 from user import collect_user_details
 
 # Configure logging
-logging.basicConfig(filename='system.log', level=logging.INFO,
-                    format='%(asctime)s - %(levelname)s - %(message)s')
+setup_logging()
 
 
 def signup():
@@ -56,25 +56,12 @@ def user_menu(username):
         print("8. Study Groups")
         print("9. Logout")
         choice = input("Choose (1-9): ").strip()
-        if choice == "1":
-            upload_resource(username)
-        elif choice == "2":
-            view_resources(username)
-        elif choice == "3":
-            download_resource(username)
-        elif choice == "4":
-            share_resource_link(username)
-        elif choice == "5":
-            rate_resource(username)
-        elif choice == "6":
-            view_reviews(username)
-        elif choice == "7":
-            calendar_menu(username)
-        elif choice == "8":
-            study_group_menu(username)
-        elif choice == "9":
+        if choice == "9":
             print("🚪 Logging out...")
             break
+        action = USER_MENU.get(choice)
+        if action:
+            action(username)
         else:
             print("❌ Invalid choice. Try again.")
 
@@ -86,12 +73,11 @@ def calendar_menu(username):
         print("2. View Calendar Events")
         print("3. Back")
         choice = input("Choose (1-3): ").strip()
-        if choice == "1":
-            add_calendar_event(username)
-        elif choice == "2":
-            view_calendar_events(username)
-        elif choice == "3":
+        if choice == "3":
             break
+        action = CALENDAR_MENU.get(choice)
+        if action:
+            action(username)
         else:
             print("❌ Invalid choice. Try again.")
 
@@ -104,14 +90,11 @@ def study_group_menu(username):
         print("3. Join Study Group")
         print("4. Back")
         choice = input("Choose (1-4): ").strip()
-        if choice == "1":
-            create_study_group(username)
-        elif choice == "2":
-            view_study_groups(username)
-        elif choice == "3":
-            join_study_group(username)
-        elif choice == "4":
+        if choice == "4":
             break
+        action = STUDY_GROUP_MENU.get(choice)
+        if action:
+            action(username)
         else:
             print("❌ Invalid choice. Try again.")
 
@@ -120,6 +103,44 @@ def admin_menu(username):
     enhanced_admin_menu(username)
 
 
+def login_menu():
+    """Log in and open the menu for the user's role."""
+    username, role = login()
+    menu = ROLE_MENUS.get(role)
+    if menu:
+        menu(username)
+
+
+# Menu choice -> action; each menu's back/exit option is handled in its loop
+USER_MENU = {
+    "1": upload_resource,
+    "2": view_resources,
+    "3": download_resource,
+    "4": share_resource_link,
+    "5": rate_resource,
+    "6": view_reviews,
+    "7": calendar_menu,
+    "8": study_group_menu,
+}
+CALENDAR_MENU = {
+    "1": add_calendar_event,
+    "2": view_calendar_events,
+}
+STUDY_GROUP_MENU = {
+    "1": create_study_group,
+    "2": view_study_groups,
+    "3": join_study_group,
+}
+ROLE_MENUS = {
+    "user": user_menu,
+    "admin": admin_menu,
+}
+MAIN_MENU = {
+    "1": signup,
+    "2": login_menu,
+}
+
+
 def main_menu():
     while True:
         print("\n=== Resource Management System ===")
@@ -127,17 +148,12 @@ def main_menu():
         print("2. Login")
         print("3. Exit")
         choice = input("Choose (1-3): ").strip()
-        if choice == "1":
-            signup()
-        elif choice == "2":
-            username, role = login()
-            if role == "user":
-                user_menu(username)
-            elif role == "admin":
-                admin_menu(username)
-        elif choice == "3":
+        if choice == "3":
             print("👋 Exiting system. Goodbye!")
             break
+        action = MAIN_MENU.get(choice)
+        if action:
+            action()
         else:
             print("❌ Invalid choice. Try again.")
 
@@ -1,45 +1,42 @@
 import sqlite3
-from db import DB_FILE
+from db import DB_FILE, add_missing_columns, pool
 
 def migrate_database():
-    """Migrate database to ensure all required columns exist"""
+    """Migrate database to ensure all schema columns exist"""
     conn = sqlite3.connect(DB_FILE)
     c = conn.cursor()
+    c.execute("PRAGMA synchronous=NORMAL")
     
     print("Starting database migration...")
     
     try:
-        # Check if user_type column exists in users table
-        c.execute("PRAGMA table_info(users)")
-        columns = [column[1] for column in c.fetchall()]
-        
-        if "user_type" not in columns:
-            print("Adding user_type column to users table...")
-            c.execute("ALTER TABLE users ADD COLUMN user_type TEXT DEFAULT 'student'")
-            print("✅ user_type column added")
-        else:
-            print("✅ user_type column already exists")
-        
-        # Ensure all other necessary columns exist
-        missing_columns = []
-        expected_columns = {
-            "full_name": "TEXT",
-            "email": "TEXT", 
-            "last_active": "TEXT",
-            "study_streak": "INTEGER DEFAULT 0",
-            "total_study_hours": "INTEGER DEFAULT 0"
-        }
-        
-        for col_name, col_type in expected_columns.items():
-            if col_name not in columns:
-                missing_columns.append((col_name, col_type))
-        
-        for col_name, col_type in missing_columns:
-            print(f"Adding {col_name} column to users table...")
-            c.execute(f"ALTER TABLE users ADD COLUMN {col_name} {col_type}")
-            print(f"✅ {col_name} column added")
+        # sqlite3 does not open a transaction before DDL, so without this each ALTER
+        # would commit (and sync) on its own; the whole migration is one transaction
+        c.execute("BEGIN IMMEDIATE")
+
+        # Columns are diffed against the schema init_db() creates, so new columns
+        # only need adding to db._SCHEMA_SQL
+        added = add_missing_columns(c)
+        for table, col_name in added:
+            print(f"✅ {table}.{col_name} column added")
+        if not added:
+            print("✅ All schema columns already exist")
         
+        # username is the PRIMARY KEY, which already has its own unique index
+        c.execute("DROP INDEX IF EXISTS idx_users_username")
+        print("✅ Redundant idx_users_username index removed")
+
         conn.commit()
+
+        # Databases created before WAL was enabled are switched over here, where the
+        # filesystem supports it
+        if pool.use_wal:
+            c.execute("PRAGMA journal_mode=WAL")
+
+        # Refresh planner statistics so new indexes are picked up
+        c.execute("ANALYZE")
+        print("✅ Query planner statistics refreshed")
+
         print("✅ Database migration completed successfully!")
         
     except Exception as e:
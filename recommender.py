@@ -0,0 +1,131 @@
+import functools
+import math
+import threading
+import time
+from db import get_connection
+
+# Rebuild the interaction matrix at most this often (seconds)
+MATRIX_TTL = 300.0
+
+SQL_INTERACTION_WEIGHTS = """SELECT user_id, resource_id, SUM(interaction_value)
+                             FROM user_interactions
+                             WHERE resource_id IS NOT NULL
+                             GROUP BY user_id, resource_id"""
+
+
+class _InteractionMatrix:
+    """User x resource interaction weights, summed over all interaction types."""
+
+    def __init__(self, rows):
+        self.user_index = {}
+        self.items = []
+        item_index = {}
+        self.weights = []  # one {item column: weight} dict per user row
+        for user_id, resource_id, weight in rows:
+            u = self.user_index.setdefault(user_id, len(self.weights))
+            if u == len(self.weights):
+                self.weights.append({})
+            i = item_index.setdefault(resource_id, len(self.items))
+            if i == len(self.items):
+                self.items.append(resource_id)
+            self.weights[u][i] = float(weight or 0)
+
+        # With NumPy the whole user-user similarity and scoring step is two matrix products
+        self.dense = None
+        np = _numpy()
+        if np is not None and self.weights:
+            self.dense = np.zeros((len(self.weights), len(self.items)), dtype=np.float32)
+            for u, row in enumerate(self.weights):
+                self.dense[u, list(row)] = list(row.values())
+            self.norms = np.linalg.norm(self.dense, axis=1)
+        self.built_at = time.monotonic()
+
+
+@functools.lru_cache(maxsize=None)
+def _numpy():
+    """Import NumPy on the first matrix build rather than at startup; None if it is not installed."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+_matrix = None
+_matrix_lock = threading.Lock()
+
+# (username, limit) -> ranked resource ids, computed from the current _matrix
+_rec_cache = {}
+
+
+def _get_matrix():
+    """Return the cached interaction matrix, rebuilding it once MATRIX_TTL has passed."""
+    global _matrix
+    with _matrix_lock:
+        if _matrix is None or time.monotonic() - _matrix.built_at > MATRIX_TTL:
+            with get_connection() as conn:
+                _matrix = _InteractionMatrix(conn.execute(SQL_INTERACTION_WEIGHTS).fetchall())
+            _rec_cache.clear()
+        return _matrix
+
+
+def invalidate_recommendations():
+    """Mark the matrix stale after a new interaction.
+
+    Every user's scores depend on every other user's interactions, so all cached
+    lists are dropped along with it when the matrix is rebuilt on the next call.
+    """
+    global _matrix
+    with _matrix_lock:
+        _matrix = None
+
+
+def _scores_numpy(matrix, u):
+    np = _numpy()
+    row = matrix.dense[u]
+    sims = matrix.dense @ row / np.maximum(matrix.norms * matrix.norms[u], 1e-12)
+    sims[u] = 0.0
+    scores = sims @ matrix.dense
+    scores[row > 0] = 0.0
+    return {i: float(scores[i]) for i in np.flatnonzero(scores > 0)}
+
+
+def _scores_python(matrix, u):
+    row = matrix.weights[u]
+    norm_u = math.sqrt(sum(w * w for w in row.values()))
+    scores = {}
+    for v, other in enumerate(matrix.weights):
+        if v == u:
+            continue
+        dot = sum(w * other[i] for i, w in row.items() if i in other)
+        if not dot:
+            continue
+        sim = dot / (norm_u * math.sqrt(sum(w * w for w in other.values())))
+        for i, w in other.items():
+            if i not in row:
+                scores[i] = scores.get(i, 0.0) + sim * w
+    return scores
+
+
+def recommend(username, limit=10):
+    """Return up to limit resource ids ranked by user-based collaborative filtering.
+
+    Each unseen resource is scored by the interaction weights of other users,
+    weighted by their cosine similarity to this user. Returns an empty list
+    for users with no interactions or no overlapping neighbours.
+    """
+    matrix = _get_matrix()
+    key = (username, limit)
+    with _matrix_lock:
+        if matrix is _matrix and key in _rec_cache:
+            return _rec_cache[key]
+    u = matrix.user_index.get(username)
+    if u is None:
+        ranked = []
+    else:
+        scores = _scores_numpy(matrix, u) if matrix.dense is not None else _scores_python(matrix, u)
+        ranked = [matrix.items[i] for i in sorted(scores, key=scores.get, reverse=True)[:limit]]
+    with _matrix_lock:
+        if matrix is _matrix:
+            _rec_cache[key] = ranked
+    return ranked
@@ -1,17 +1,87 @@
 import os
-import shutil
+import re
 from datetime import datetime
-from db import DB_FILE, RESOURCES_DIR, VIDEOS_DIR
+from db import RESOURCES_DIR, VIDEOS_DIR, SQL_USER_VERIFIED, get_connection, queue_write
 import sqlite3
-from utils import generate_share_link, log_interaction, create_notification
+from utils import (generate_share_link, log_interaction, create_notification, stream_rows, TIMESTAMP_FORMAT, now_str,
+                   SQL_INSERT_INTERACTION)
+from admin import invalidate_pending_resources
+from recommender import recommend, invalidate_recommendations
+
+# Download and rating statements, shared by every call site so each one reuses the
+# connection's cached prepared statement
+SQL_APPROVED_FILE = "SELECT file_path, download_count, title FROM resources WHERE id = ? AND status = 'approved'"
+SQL_INCREMENT_DOWNLOADS = "UPDATE resources SET download_count = COALESCE(download_count, 0) + 1 WHERE id = ?"
+SQL_INSERT_DOWNLOAD = "INSERT INTO download_history (user_id, resource_id, download_date) VALUES (?, ?, ?)"
+# Upload-time category lookup and creation. name_lower is filled in the INSERT rather than
+# left to its trigger, so a case variant that already exists is skipped by ON CONFLICT
+# instead of failing inside the trigger
+SQL_CATEGORY_BY_NAME = "SELECT id, name FROM categories WHERE name_lower = lower(?)"
+SQL_INSERT_UPLOAD_CATEGORY = """INSERT INTO categories (name, description, color, created_by, created_date, name_lower)
+                                VALUES (?, ?, ?, ?, ?, lower(?1)) ON CONFLICT DO NOTHING"""
+SQL_INSERT_REVIEW = """INSERT INTO reviews (resource_id, reviewer, rating, comment, review_date)
+                       VALUES (?, ?, ?, ?, ?) ON CONFLICT(resource_id, reviewer) DO NOTHING"""
+
+# view_resources listings. Rating aggregates come precomputed from resource_overview,
+# one primary-key lookup per row instead of grouping over reviews. Every filter is a
+# parameter (None when unused), so all the filter choices share one prepared statement;
+# full-text search needs the FTS table and has its own. The category filter goes through
+# the integer category_id, falling back to the stored name for resources whose category
+# could not be resolved to an id. Each row comes back as its finished listing block,
+# formatted by SQLite's printf(); NULLs print as "None"
+_SQL_LIST_SELECT = """SELECT printf('ID: %s | Title: %s
+  Description: %s
+  Category: %s | Difficulty: %s | Type: %s%s%s
+  Upload Date: %s | Downloads: %s%s
+  Share Link: %s
+',
+                             r.id, ifnull(r.title, 'None'), ifnull(r.description, 'None'),
+                             ifnull(r.category_name, 'None'), ifnull(r.difficulty_level, 'None'),
+                             CASE WHEN r.is_video THEN 'Video' ELSE 'Document' END,
+                             CASE WHEN r.is_video THEN ' | Duration: ' || ifnull(r.video_duration, 'None') ELSE '' END,
+                             CASE WHEN r.estimated_time <> '' THEN ' | Est. Time: ' || r.estimated_time ELSE '' END,
+                             ifnull(r.upload_date, 'None'), ifnull(r.download_count, 'None'),
+                             CASE WHEN o.review_count > 0
+                                  THEN printf(' | Rating: %.1f/5 (%d reviews)', o.avg_rating, o.review_count)
+                                  ELSE ' | No ratings yet' END,
+                             ifnull(r.share_link, 'None'))
+                      FROM resources r 
+                      JOIN resource_overview o ON o.resource_id = r.id
+                      WHERE r.status = 'approved'"""
+SQL_LIST_RESOURCES = _SQL_LIST_SELECT + """
+                      AND (:is_video IS NULL OR r.is_video = :is_video)
+                      AND (:category IS NULL OR r.category_id IN (SELECT id FROM categories WHERE name LIKE :category)
+                           OR (r.category_id IS NULL AND r.category_name LIKE :category))
+                      AND (:difficulty IS NULL OR r.difficulty_level = :difficulty)
+                      ORDER BY r.upload_epoch DESC"""
+SQL_SEARCH_RESOURCES = _SQL_LIST_SELECT + """
+                      AND r.id IN (SELECT rowid FROM resources_fts WHERE resources_fts MATCH :match)
+                      ORDER BY r.upload_epoch DESC"""
+
+# Uploads with these extensions are stored under VIDEOS_DIR
+VIDEO_EXTS = frozenset({'.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv'})
+
+_DIVIDER = "-" * 80 + "\n"
+
+def _format_resources(resources):
+    """Yield the view_resources listing; the blocks come preformatted from SQL."""
+    for (block,) in resources:
+        yield block
+        yield _DIVIDER
+
+def _format_reviews(reviews):
+    """Yield the view_reviews listing one review block at a time."""
+    for rev in reviews:
+        comment = f"Comment: {rev[2]}\n" if rev[2] else ""
+        yield (f"Reviewer: {rev[0]} | Rating: {rev[1]}/5 | Date: {rev[3]}\n"
+               f"{comment}"
+               f"Helpfulness: {rev[4]}\n"
+               f"{'-' * 50}\n")
 
 def upload_resource(username):
-    conn = None
     try:
-        conn = sqlite3.connect(DB_FILE, timeout=30.0)
-        c = conn.cursor()
-        c.execute("SELECT is_verified FROM users WHERE username = ?", (username,))
-        result = c.fetchone()
+        with get_connection() as conn:
+            result = conn.execute(SQL_USER_VERIFIED, (username,)).fetchone()
         if not result or not result[0]:
             print("User not verified!")
             return
@@ -23,30 +93,33 @@ def upload_resource(username):
         difficulty = input("Difficulty level (beginner/intermediate/advanced): ") or "beginner"
         estimated_time = input("Estimated study time (e.g., 30 minutes): ")
         
-        c.execute("SELECT name FROM categories WHERE name = ?", (category_name,))
-        if not c.fetchone():
+        # Category names are matched case-insensitively; an existing category keeps its stored name
+        with get_connection() as conn:
+            category_exists = conn.execute(SQL_CATEGORY_BY_NAME, (category_name,)).fetchone()
+        color = None
+        if category_exists:
+            category_name = category_exists['name']
+        else:
             color = input("Enter category color (optional): ") or "#007bff"
-            c.execute("INSERT INTO categories (name, description, color, created_by, created_date) VALUES (?, ?, ?, ?, ?)", 
-                      (category_name, "", color, username, datetime.now().strftime("%Y-%m-%d")))
         
         file_path = input("Enter file path to upload: ").strip('"\'')
-        if not os.path.exists(file_path):
+        # One stat() answers both "does it exist" and "how big is it"
+        try:
+            file_size = os.stat(file_path).st_size
+        except FileNotFoundError:
             print(f"File not found at: {file_path}")
             return
         
-        file_size = os.path.getsize(file_path)
-        file_ext = os.path.splitext(file_path)[1].lower()
-        is_video = 1 if file_ext in ['.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv'] else 0
-        
         file_name = os.path.basename(file_path)
+        file_ext = os.path.splitext(file_name)[1].lower()
+        is_video = 1 if file_ext in VIDEO_EXTS else 0
+        
         dest_dir = VIDEOS_DIR if is_video else RESOURCES_DIR
         dest_path = os.path.join(dest_dir, file_name)
         
-        # Close connection before file operations
-        conn.close()
-        conn = None
-        
-        # File copy without database connection open
+        # File copy without a database connection checked out. shutil is imported here,
+        # on first use, so commands that never copy files do not pay for it at startup
+        import shutil
         try:
             shutil.copy2(file_path, dest_path)
         except Exception as e:
@@ -59,21 +132,30 @@ def upload_resource(username):
         
         share_link = generate_share_link()
         
-        # Reopen connection for database insert
-        conn = sqlite3.connect(DB_FILE, timeout=30.0)
-        c = conn.cursor()
-        
-        c.execute("""INSERT INTO resources 
-                     (title, description, category_name, uploaded_by, file_path, file_type, 
-                      upload_date, status, download_count, file_size, tags, is_video, video_duration, 
-                      share_link, difficulty_level, estimated_time) 
-                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                  (title, description, category_name, username, dest_path, file_ext, 
-                   datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "pending", 0, file_size, 
-                   tags, is_video, video_duration, share_link, difficulty, estimated_time))
-        
-        resource_id = c.lastrowid
-        conn.commit()
+        # The new category (if any) and the resource that references it commit together
+        now = datetime.now()
+        with get_connection(write=True) as conn:
+            c = conn.cursor()
+            c.execute("BEGIN IMMEDIATE")
+            if color is not None:
+                c.execute(SQL_INSERT_UPLOAD_CATEGORY,
+                          (category_name, "", color, username, now.strftime("%Y-%m-%d")))
+            # A case variant created since the lookup above wins; the resource takes its name
+            category = c.execute(SQL_CATEGORY_BY_NAME, (category_name,)).fetchone()
+            category_id, category_name = category['id'], category['name']
+            
+            c.execute("""INSERT INTO resources 
+                         (title, description, category_name, uploaded_by, file_path, file_type, 
+                          upload_date, status, download_count, file_size, tags, is_video, video_duration, 
+                          share_link, difficulty_level, estimated_time, upload_epoch, category_id) 
+                         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                      (title, description, category_name, username, dest_path, file_ext, 
+                       now.strftime(TIMESTAMP_FORMAT), "pending", 0, file_size, 
+                       tags, is_video, video_duration, share_link, difficulty, estimated_time, int(now.timestamp()), category_id))
+            
+            resource_id = c.lastrowid
+            conn.commit()
+        invalidate_pending_resources()
         print(f"Resource uploaded (ID: {resource_id}) - Awaiting approval.")
         print(f"Share link: {share_link}")
         
@@ -81,16 +163,9 @@ def upload_resource(username):
         print(f"Database error: {e}")
     except Exception as e:
         print(f"Upload error: {e}")
-    finally:
-        if conn:
-            conn.close()
 
 def view_resources(username):
-    conn = None
     try:
-        conn = sqlite3.connect(DB_FILE, timeout=30.0)
-        c = conn.cursor()
-        
         print("\n--- Filter Options ---")
         print("1. All approved resources")
         print("2. Videos only")
@@ -103,126 +178,116 @@ def view_resources(username):
         filter_choice = input("Choose filter (1-7): ")
         
         if filter_choice == "7":
-            conn.close()
-            conn = None
             get_recommendations(username)
             return
         
-        base_query = """SELECT r.id, r.title, r.description, r.category_name, r.upload_date, 
-                               r.download_count, r.is_video, r.video_duration, r.file_type,
-                               r.difficulty_level, r.estimated_time, r.share_link,
-                               COALESCE(AVG(rev.rating), 0) as avg_rating, COUNT(rev.id) as review_count
-                        FROM resources r 
-                        LEFT JOIN reviews rev ON r.id = rev.resource_id
-                        WHERE r.status = 'approved'"""
-        
-        params = []
+        query = SQL_LIST_RESOURCES
+        params = {"is_video": None, "category": None, "difficulty": None}
         
         if filter_choice == "2":
-            base_query += " AND r.is_video = 1"
+            params["is_video"] = 1
         elif filter_choice == "3":
-            base_query += " AND r.is_video = 0"
+            params["is_video"] = 0
         elif filter_choice == "4":
             category = input("Enter category name: ")
-            base_query += " AND r.category_name LIKE ?"
-            params.append(f"%{category}%")
+            params["category"] = f"%{category}%"
         elif filter_choice == "5":
-            search_term = input("Enter search term: ")
-            base_query += " AND (r.title LIKE ? OR r.description LIKE ?)"
-            params.extend([f"%{search_term}%", f"%{search_term}%"])
+            search_term = input("Enter search term (matches words and word beginnings): ")
+            # Full-text lookup; every word in the term must prefix-match a word in the
+            # title or description, so "alg" finds "Algebra" but "gebra" does not
+            words = re.findall(r"\w+", search_term)
+            if not words:
+                # Nothing searchable (e.g. "!!"), so nothing can match
+                print("No resources found.")
+                return
+            query = SQL_SEARCH_RESOURCES
+            params = {"match": " ".join(f'"{word}"*' for word in words)}
         elif filter_choice == "6":
             difficulty = input("Difficulty (beginner/intermediate/advanced): ")
-            base_query += " AND r.difficulty_level = ?"
-            params.append(difficulty)
-        
-        base_query += " GROUP BY r.id ORDER BY r.upload_date DESC"
+            params["difficulty"] = difficulty
         
-        c.execute(base_query, params)
-        resources = c.fetchall()
-        
-        if not resources:
-            print("No resources found.")
-            return
-        
-        for resource in resources:
-            video_info = f" | Duration: {resource[7]}" if resource[6] else ""
-            rating_info = f" | Rating: {resource[12]:.1f}/5 ({resource[13]} reviews)" if resource[13] > 0 else " | No ratings yet"
-            time_info = f" | Est. Time: {resource[10]}" if resource[10] else ""
-            print(f"ID: {resource[0]} | Title: {resource[1]}")
-            print(f"  Description: {resource[2]}")
-            print(f"  Category: {resource[3]} | Difficulty: {resource[9]} | Type: {'Video' if resource[6] else 'Document'}{video_info}{time_info}")
-            print(f"  Upload Date: {resource[4]} | Downloads: {resource[5]}{rating_info}")
-            print(f"  Share Link: {resource[11]}")
-            print("-" * 80)
+        # Pure read: served by a read-only pooled connection, checked out after the prompts.
+        # Rows are streamed in batches rather than loaded with fetchall()
+        with get_connection() as conn:
+            if not stream_rows(conn.execute(query, params), _format_resources):
+                print("No resources found.")
             
     except sqlite3.Error as e:
         print(f"Database error: {e}")
     except Exception as e:
         print(f"View resources error: {e}")
-    finally:
-        if conn:
-            conn.close()
 
 def get_recommendations(username):
     """AI-based resource recommendations"""
-    conn = None
     try:
-        conn = sqlite3.connect(DB_FILE, timeout=30.0)
-        c = conn.cursor()
-        
-        # Get user's interaction history
-        c.execute("""SELECT r.category_name, COUNT(*) as interaction_count
-                     FROM user_interactions ui
-                     JOIN resources r ON ui.resource_id = r.id
-                     WHERE ui.user_id = ?
-                     GROUP BY r.category_name
-                     ORDER BY interaction_count DESC""", (username,))
-        
-        user_categories = c.fetchall()
-        
-        if not user_categories:
-            print("No interaction history found. Showing popular resources instead.")
-            c.execute("""SELECT r.id, r.title, r.category_name, r.download_count,
-                                COALESCE(AVG(rev.rating), 0) as avg_rating
-                         FROM resources r
-                         LEFT JOIN reviews rev ON r.id = rev.resource_id
-                         WHERE r.status = 'approved'
-                         GROUP BY r.id
-                         ORDER BY r.download_count DESC, avg_rating DESC
-                         LIMIT 10""")
-        else:
-            # Recommend resources from user's preferred categories
-            preferred_category = user_categories[0][0]
-            c.execute("""SELECT r.id, r.title, r.category_name, r.download_count,
-                                COALESCE(AVG(rev.rating), 0) as avg_rating
-                         FROM resources r
-                         LEFT JOIN reviews rev ON r.id = rev.resource_id
-                         WHERE r.status = 'approved' AND r.category_name = ?
-                         AND r.id NOT IN (
-                             SELECT resource_id FROM user_interactions WHERE user_id = ?
-                         )
-                         GROUP BY r.id
-                         ORDER BY avg_rating DESC, r.download_count DESC
-                         LIMIT 10""", (preferred_category, username))
+        # Collaborative filtering over every user's interactions comes first; candidates
+        # are over-fetched because some may no longer be approved
+        candidates = recommend(username, limit=30)
         
-        recommendations = c.fetchall()
+        with get_connection() as conn:
+            c = conn.cursor()
+            
+            if candidates:
+                placeholders = ", ".join("?" * len(candidates))
+                c.execute(f"""SELECT resource_id, title, category_name, download_count, avg_rating
+                              FROM resource_overview
+                              WHERE status = 'approved' AND resource_id IN ({placeholders})""", candidates)
+                rank = {resource_id: n for n, resource_id in enumerate(candidates)}
+                recommendations = sorted(c.fetchall(), key=lambda rec: rank[rec[0]])[:10]
+                if recommendations:
+                    _print_recommendations(username, recommendations)
+                    return
+            
+            # Get user's interaction history. Categories group by id, falling back to the
+            # stored name for unresolved ones, as the category filter in view_resources does
+            c.execute("""SELECT r.category_name, COUNT(*) as interaction_count
+                         FROM user_interactions ui
+                         JOIN resources r ON ui.resource_id = r.id
+                         WHERE ui.user_id = ?
+                         GROUP BY coalesce(r.category_id, r.category_name)
+                         ORDER BY interaction_count DESC""", (username,))
+            
+            user_categories = c.fetchall()
+            
+            if not user_categories:
+                print("No interaction history found. Showing popular resources instead.")
+                c.execute("""SELECT resource_id, title, category_name, download_count, avg_rating
+                             FROM resource_overview
+                             WHERE status = 'approved'
+                             ORDER BY download_count DESC, avg_rating DESC
+                             LIMIT 10""")
+            else:
+                # Recommend resources from user's preferred categories. The anti-join probes
+                # idx_user_interactions_user once per candidate, and unlike NOT IN it is not
+                # emptied by interactions logged without a resource_id
+                preferred_category = user_categories[0][0]
+                c.execute("""SELECT ro.resource_id, ro.title, ro.category_name, ro.download_count, ro.avg_rating
+                             FROM resource_overview ro
+                             LEFT JOIN user_interactions ui
+                                    ON ui.user_id = ? AND ui.resource_id = ro.resource_id
+                             WHERE ro.status = 'approved' AND ro.category_name = ?
+                             AND ui.resource_id IS NULL
+                             ORDER BY ro.avg_rating DESC, ro.download_count DESC
+                             LIMIT 10""", (username, preferred_category))
+            
+            recommendations = c.fetchall()
         
-        if recommendations:
-            print(f"\nRecommended Resources for {username}:")
-            print("=" * 50)
-            for rec in recommendations:
-                rating_text = f" | Rating: {rec[4]:.1f}/5" if rec[4] > 0 else ""
-                print(f"ID: {rec[0]} | {rec[1]} | Category: {rec[2]} | Downloads: {rec[3]}{rating_text}")
-        else:
-            print("No recommendations available at the moment.")
+        _print_recommendations(username, recommendations)
             
     except sqlite3.Error as e:
         print(f"Database error: {e}")
     except Exception as e:
         print(f"Recommendations error: {e}")
-    finally:
-        if conn:
-            conn.close()
+
+def _print_recommendations(username, recommendations):
+    if recommendations:
+        print(f"\nRecommended Resources for {username}:")
+        print("=" * 50)
+        for rec in recommendations:
+            rating_text = f" | Rating: {rec[4]:.1f}/5" if rec[4] > 0 else ""
+            print(f"ID: {rec[0]} | {rec[1]} | Category: {rec[2]} | Downloads: {rec[3]}{rating_text}")
+    else:
+        print("No recommendations available at the moment.")
 
 def download_resource(username):
     try:
@@ -231,71 +296,49 @@ def download_resource(username):
         print("Invalid resource ID!")
         return
     
-    conn = None
     try:
-        # STEP 1: Get resource info quickly and close connection
-        conn = sqlite3.connect(DB_FILE, timeout=30.0)
-        c = conn.cursor()
-        c.execute("SELECT file_path, download_count, title FROM resources WHERE id = ? AND status = 'approved'", (resource_id,))
-        result = c.fetchone()
+        # STEP 1: Get resource info from a reader
+        with get_connection() as conn:
+            result = conn.execute(SQL_APPROVED_FILE, (resource_id,)).fetchone()
         
         if not result:
             print("Resource not found or not approved!")
             return
             
         file_path, count, title = result
-        conn.close()
-        conn = None
         
-        # STEP 2: Check file existence (no database connection open)
-        if not os.path.exists(file_path):
+        # STEP 2: Check file existence (no database connection checked out)
+        if not os.access(file_path, os.F_OK):
             print("Source file no longer exists!")
             return
         
         print(f"Downloading '{title}'... (Current Downloads: {count})")
         
-        # STEP 3: Perform file copy (no database connection open)
+        # STEP 3: Perform file copy (no database connection checked out)
+        import shutil
         try:
             downloaded_name = f"downloaded_{os.path.basename(file_path)}"
-            with open(file_path, 'rb') as f:
-                with open(downloaded_name, 'wb') as out:
-                    out.write(f.read())
+            # Streams the file (sendfile/copy_file_range where available) instead of
+            # reading the whole thing into memory
+            shutil.copyfile(file_path, downloaded_name)
             print(f"File downloaded as: {downloaded_name}")
         except Exception as e:
             print(f"Error downloading file: {e}")
             return
         
-        # STEP 4: Update database with separate, quick connection
-        try:
-            conn = sqlite3.connect(DB_FILE, timeout=30.0)
-            c = conn.cursor()
-            
-            # Update download count
-            c.execute("UPDATE resources SET download_count = COALESCE(download_count, 0) + 1 WHERE id = ?", (resource_id,))
-            
-            # Add to download history
-            c.execute("INSERT INTO download_history (user_id, resource_id, download_date) VALUES (?, ?, ?)",
-                      (username, resource_id, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
-            
-            conn.commit()
-            print(f"Updated download count to: {count + 1}")
-            
-            # Log interaction (handle gracefully if fails)
-            try:
-                log_interaction(username, resource_id, "download", 3)
-            except Exception as e:
-                print(f"Warning: Could not log interaction: {e}")
-                
-        except sqlite3.Error as e:
-            print(f"Warning: Download successful but couldn't update statistics: {e}")
+        # STEP 4: Queue the statistics for the background writer. The download count,
+        # history row and interaction still commit together, but the user does not wait
+        now = now_str()
+        queue_write([(SQL_INCREMENT_DOWNLOADS, (resource_id,)),
+                     (SQL_INSERT_DOWNLOAD, (username, resource_id, now)),
+                     (SQL_INSERT_INTERACTION, (username, resource_id, "download", now, 3))],
+                    on_commit=invalidate_recommendations)
+        print(f"Updated download count to: {count + 1}")
             
     except sqlite3.Error as e:
         print(f"Database error: {e}")
     except Exception as e:
         print(f"Download error: {e}")
-    finally:
-        if conn:
-            conn.close()
 
 def share_resource_link(username):
     """Generate and display shareable links"""
@@ -305,12 +348,10 @@ def share_resource_link(username):
         print("Invalid resource ID!")
         return
     
-    conn = None
     try:
-        conn = sqlite3.connect(DB_FILE, timeout=30.0)
-        c = conn.cursor()
-        c.execute("SELECT title, share_link FROM resources WHERE id = ? AND status = 'approved'", (resource_id,))
-        result = c.fetchone()
+        with get_connection() as conn:
+            result = conn.execute("SELECT title, share_link FROM resources WHERE id = ? AND status = 'approved'",
+                                  (resource_id,)).fetchone()
         
         if result:
             title, share_link = result
@@ -330,19 +371,14 @@ def share_resource_link(username):
         print(f"Database error: {e}")
     except Exception as e:
         print(f"Share link error: {e}")
-    finally:
-        if conn:
-            conn.close()
 
 def access_shared_resource():
     """Access resource via share link"""
     share_link = input("Enter share link: ")
-    conn = None
     try:
-        conn = sqlite3.connect(DB_FILE, timeout=30.0)
-        c = conn.cursor()
-        c.execute("SELECT id, title, description, uploaded_by FROM resources WHERE share_link = ? AND status = 'approved'", (share_link,))
-        result = c.fetchone()
+        with get_connection() as conn:
+            result = conn.execute("SELECT id, title, description, uploaded_by FROM resources WHERE share_link = ? AND status = 'approved'",
+                                  (share_link,)).fetchone()
         
         if result:
             resource_id, title, description, uploader = result
@@ -352,9 +388,8 @@ def access_shared_resource():
             print(f"Uploaded by: {uploader}")
             
             if input("\nDownload this resource? (y/n): ").lower() == 'y':
-                # Update download count for anonymous user
-                c.execute("UPDATE resources SET download_count = COALESCE(download_count, 0) + 1 WHERE id = ?", (resource_id,))
-                conn.commit()
+                # Update download count for anonymous user in the background
+                queue_write([(SQL_INCREMENT_DOWNLOADS, (resource_id,))])
                 print("Resource download initiated!")
         else:
             print("Invalid share link or resource not found!")
@@ -363,9 +398,6 @@ def access_shared_resource():
         print(f"Database error: {e}")
     except Exception as e:
         print(f"Access shared resource error: {e}")
-    finally:
-        if conn:
-            conn.close()
 
 def rate_resource(username):
     try:
@@ -374,22 +406,16 @@ def rate_resource(username):
         print("Invalid resource ID!")
         return
     
-    conn = None
     try:
-        conn = sqlite3.connect(DB_FILE, timeout=30.0)
-        c = conn.cursor()
-        
-        # Check if resource exists and is approved
-        c.execute("SELECT title FROM resources WHERE id = ? AND status = 'approved'", (resource_id,))
-        resource = c.fetchone()
+        with get_connection() as conn:
+            # Check the resource is approved and whether the user already rated it, in one query
+            resource = conn.execute("""SELECT title, EXISTS (SELECT 1 FROM reviews WHERE resource_id = r.id AND reviewer = ?)
+                                       FROM resources r WHERE id = ? AND status = 'approved'""",
+                                    (username, resource_id)).fetchone()
         if not resource:
             print("Resource not found or not approved!")
             return
-        
-        # Check if user already rated this resource
-        c.execute("SELECT id FROM reviews WHERE resource_id = ? AND reviewer = ?", (resource_id, username))
-        existing = c.fetchone()
-        if existing:
+        if resource[1]:
             print("You have already rated this resource!")
             return
         
@@ -407,25 +433,30 @@ def rate_resource(username):
         
         comment = input("Enter your review (optional): ")
         
-        c.execute("INSERT INTO reviews (resource_id, reviewer, rating, comment, review_date) VALUES (?, ?, ?, ?, ?)",
-                  (resource_id, username, rating, comment, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
-        
-        conn.commit()
+        now = now_str()
+        with get_connection(write=True) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # idx_reviews_unique settles a review submitted meanwhile from another session
+            inserted = conn.execute(SQL_INSERT_REVIEW, (resource_id, username, rating, comment, now)).rowcount
+            if not inserted:
+                conn.rollback()
+                print("You have already rated this resource!")
+                return
+            
+            # Log interaction in the same transaction (handle gracefully if fails)
+            try:
+                conn.execute(SQL_INSERT_INTERACTION, (username, resource_id, "rate", now, rating))
+            except sqlite3.Error as e:
+                print(f"Warning: Could not log interaction: {e}")
+            
+            conn.commit()
+        invalidate_recommendations()
         print("Review submitted successfully!")
-        
-        # Log interaction (handle gracefully if fails)
-        try:
-            log_interaction(username, resource_id, "rate", rating)
-        except Exception as e:
-            print(f"Warning: Could not log interaction: {e}")
             
     except sqlite3.Error as e:
         print(f"Database error: {e}")
     except Exception as e:
         print(f"Rating error: {e}")
-    finally:
-        if conn:
-            conn.close()
 
 def view_reviews(username):
     try:
@@ -434,37 +465,24 @@ def view_reviews(username):
         print("Invalid resource ID!")
         return
     
-    conn = None
     try:
-        conn = sqlite3.connect(DB_FILE, timeout=30.0)
-        c = conn.cursor()
-        
-        c.execute("SELECT title FROM resources WHERE id = ?", (resource_id,))
-        resource = c.fetchone()
-        if not resource:
-            print("Resource not found!")
-            return
-        
-        print(f"\nReviews for '{resource[0]}':")
-        
-        c.execute("""SELECT reviewer, rating, comment, review_date, helpfulness
-                     FROM reviews WHERE resource_id = ? ORDER BY review_date DESC""", (resource_id,))
-        reviews = c.fetchall()
-        
-        if reviews:
-            for rev in reviews:
-                print(f"Reviewer: {rev[0]} | Rating: {rev[1]}/5 | Date: {rev[3]}")
-                if rev[2]:
-                    print(f"Comment: {rev[2]}")
-                print(f"Helpfulness: {rev[4]}")
-                print("-" * 50)
-        else:
-            print("No reviews yet.")
+        with get_connection() as conn:
+            c = conn.cursor()
+            
+            c.execute("SELECT title FROM resources WHERE id = ?", (resource_id,))
+            resource = c.fetchone()
+            if not resource:
+                print("Resource not found!")
+                return
+            
+            print(f"\nReviews for '{resource[0]}':")
+            
+            c.execute("""SELECT reviewer, rating, comment, review_date, helpfulness
+                         FROM reviews WHERE resource_id = ? ORDER BY review_date DESC""", (resource_id,))
+            if not stream_rows(c, _format_reviews):
+                print("No reviews yet.")
             
     except sqlite3.Error as e:
         print(f"Database error: {e}")
     except Exception as e:
         print(f"View reviews error: {e}")
-    finally:
-        if conn:
-            conn.close()
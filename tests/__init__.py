@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+
+# db opens resources.db (and the app writes system.log) relative to the working
+# directory, so the suite runs from a scratch directory and never touches the
+# checked-in database
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(tempfile.mkdtemp(prefix="srh-tests-"))
@@ -0,0 +1,98 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+import admin
+import db
+import resource
+
+
+class RenameCategoryTest(unittest.TestCase):
+    """Renaming a category that resources still reference."""
+
+    @classmethod
+    def setUpClass(cls):
+        db.init_db()
+
+    def setUp(self):
+        with db.get_connection(write=True) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM resources")
+            conn.execute("DELETE FROM categories")
+            self.cat_id = conn.execute("INSERT INTO categories (name, color) VALUES ('Math', '#007bff')").lastrowid
+            self.resource_id = conn.execute(
+                """INSERT INTO resources (title, uploaded_by, category_name, status, upload_date)
+                   VALUES ('Algebra notes', 'admin', 'Math', 'approved', '2024-01-01 10:00:00')""").lastrowid
+            conn.commit()
+
+    def edit_category(self, *answers):
+        with mock.patch("builtins.input", side_effect=["3", str(self.cat_id), *answers, "6"]), \
+                redirect_stdout(io.StringIO()) as out:
+            admin.manage_categories()
+        self.assertIn(f"Category ID {self.cat_id} updated successfully", out.getvalue())
+
+    def test_rename_moves_referencing_resources(self):
+        self.edit_category("Mathematics", "", "")
+
+        with db.get_connection() as conn:
+            self.assertEqual(conn.execute("SELECT name FROM categories WHERE id = ?",
+                                          (self.cat_id,)).fetchone()[0], "Mathematics")
+            resource = conn.execute("SELECT category_name, category_id FROM resources WHERE id = ?",
+                                    (self.resource_id,)).fetchone()
+            self.assertEqual(tuple(resource), ("Mathematics", self.cat_id))
+            overview = conn.execute("SELECT category_name FROM resource_overview WHERE resource_id = ?",
+                                    (self.resource_id,)).fetchone()
+            self.assertEqual(overview[0], "Mathematics")
+            self.assertEqual(conn.execute("PRAGMA foreign_key_check").fetchall(), [])
+
+    def test_edit_without_rename_keeps_resources(self):
+        self.edit_category("", "Numbers and more", "#112233")
+
+        with db.get_connection() as conn:
+            row = conn.execute("SELECT name, description, color FROM categories WHERE id = ?",
+                               (self.cat_id,)).fetchone()
+            self.assertEqual(tuple(row), ("Math", "Numbers and more", "#112233"))
+            self.assertEqual(conn.execute("SELECT category_name FROM resources WHERE id = ?",
+                                          (self.resource_id,)).fetchone()[0], "Math")
+
+
+
+class UploadCategoryTest(unittest.TestCase):
+    """Uploading into a category named with different letter case."""
+
+    @classmethod
+    def setUpClass(cls):
+        db.init_db()
+        with db.get_connection(write=True) as conn:
+            conn.execute("""INSERT INTO users (username, password, is_verified) VALUES ('uploader', 'x', 1)
+                            ON CONFLICT DO NOTHING""")
+
+    def setUp(self):
+        with db.get_connection(write=True) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM resources")
+            conn.execute("DELETE FROM categories")
+            self.cat_id = conn.execute("INSERT INTO categories (name, color) VALUES ('Math', '#007bff')").lastrowid
+            conn.commit()
+        fd, self.file_path = tempfile.mkstemp(suffix=".txt")
+        os.close(fd)
+        self.addCleanup(os.remove, self.file_path)
+
+    def test_case_variant_reuses_existing_category(self):
+        # No color prompt: the category is recognised as existing
+        answers = ["Algebra notes", "desc", "math", "", "", "", self.file_path]
+        with mock.patch("builtins.input", side_effect=answers), redirect_stdout(io.StringIO()) as out:
+            resource.upload_resource("uploader")
+        self.assertIn("Awaiting approval", out.getvalue())
+
+        with db.get_connection() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM categories").fetchone()[0], 1)
+            row = conn.execute("SELECT category_name, category_id FROM resources").fetchone()
+            self.assertEqual(tuple(row), ("Math", self.cat_id))
+
+
+if __name__ == "__main__":
+    unittest.main()
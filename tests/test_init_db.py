@@ -0,0 +1,148 @@
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from tests import ROOT
+
+
+class LegacyDatabaseTest(unittest.TestCase):
+    """init_db() on a database created before group_members and favorites were WITHOUT ROWID."""
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp(prefix="srh-legacy-")
+        self.addCleanup(shutil.rmtree, self.workdir, ignore_errors=True)
+        conn = sqlite3.connect(os.path.join(self.workdir, "resources.db"))
+        conn.executescript("""
+            CREATE TABLE favorites (
+                user_id TEXT,
+                resource_id INTEGER,
+                added_date TEXT DEFAULT (datetime('now')),
+                PRIMARY KEY (user_id, resource_id)
+            );
+            CREATE TABLE group_members (
+                group_id INTEGER,
+                member_username TEXT,
+                join_date TEXT DEFAULT (datetime('now')),
+                role TEXT DEFAULT 'member',
+                is_active INTEGER DEFAULT 1,
+                contribution_score INTEGER DEFAULT 0,
+                PRIMARY KEY (group_id, member_username)
+            );
+            INSERT INTO group_members (group_id, member_username) VALUES (1, 'alice');
+        """)
+        conn.close()
+
+    def run_init_db(self):
+        # db binds resources.db to the working directory, so init_db runs in its own process
+        subprocess.run([sys.executable, "-c", "import db; db.init_db()"], cwd=self.workdir,
+                       env={**os.environ, "PYTHONPATH": ROOT}, check=True,
+                       stdout=subprocess.DEVNULL)
+
+    def test_first_init_keeps_schema_indexes_on_rebuilt_tables(self):
+        self.run_init_db()
+
+        conn = sqlite3.connect(os.path.join(self.workdir, "resources.db"))
+        try:
+            index = conn.execute("""SELECT tbl_name FROM sqlite_master
+                                    WHERE type = 'index' AND name = 'idx_group_members_member'""").fetchone()
+            self.assertEqual(index, ("group_members",))
+            for table in ("favorites", "group_members"):
+                sql = conn.execute("SELECT sql FROM sqlite_master WHERE name = ?", (table,)).fetchone()[0]
+                self.assertTrue(sql.rstrip().upper().endswith("WITHOUT ROWID"), table)
+            self.assertEqual(conn.execute("SELECT group_id, member_username FROM group_members").fetchall(),
+                             [(1, "alice")])
+            self.assertIsNone(conn.execute("SELECT 1 FROM sqlite_master WHERE name LIKE '%\\_old' ESCAPE '\\'").fetchone())
+        finally:
+            conn.close()
+
+
+
+class CaseVariantUsernamesTest(unittest.TestCase):
+    """init_db() on a database holding usernames that differ only in case."""
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp(prefix="srh-legacy-")
+        self.addCleanup(shutil.rmtree, self.workdir, ignore_errors=True)
+        self.db_file = os.path.join(self.workdir, "resources.db")
+        conn = sqlite3.connect(self.db_file)
+        conn.executescript("""
+            CREATE TABLE users (username TEXT PRIMARY KEY, password TEXT NOT NULL,
+                                role TEXT DEFAULT 'user', is_verified INTEGER DEFAULT 0);
+            INSERT INTO users (username, password) VALUES ('Alice', 'x'), ('alice', 'y');
+        """)
+        conn.close()
+
+    def run_init_db(self):
+        return subprocess.run([sys.executable, "-c", "import db; db.init_db()"], cwd=self.workdir,
+                              env={**os.environ, "PYTHONPATH": ROOT}, check=True,
+                              capture_output=True, text=True).stdout
+
+    def username_lower_unique(self):
+        conn = sqlite3.connect(self.db_file)
+        try:
+            indexes = {row[1]: row[2] for row in conn.execute("PRAGMA index_list(users)")}
+        finally:
+            conn.close()
+        return indexes["idx_users_username_lower"]
+
+    def test_duplicates_are_reported_and_startup_continues(self):
+        output = self.run_init_db()
+
+        self.assertIn("Alice, alice", output)
+        self.assertEqual(self.username_lower_unique(), 0)
+
+    def test_index_becomes_unique_once_duplicates_are_resolved(self):
+        self.run_init_db()
+        conn = sqlite3.connect(self.db_file)
+        conn.execute("UPDATE users SET username = 'alice2' WHERE username = 'alice'")
+        conn.commit()
+        conn.close()
+
+        self.run_init_db()
+
+        self.assertEqual(self.username_lower_unique(), 1)
+
+
+
+class DuplicateReviewsTest(unittest.TestCase):
+    """init_db() on a database from before reviews were unique per user and resource."""
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp(prefix="srh-legacy-")
+        self.addCleanup(shutil.rmtree, self.workdir, ignore_errors=True)
+        self.db_file = os.path.join(self.workdir, "resources.db")
+        conn = sqlite3.connect(self.db_file)
+        conn.executescript("""
+            CREATE TABLE reviews (id INTEGER PRIMARY KEY AUTOINCREMENT, resource_id INTEGER, reviewer TEXT,
+                                  rating INTEGER, comment TEXT, review_date TEXT);
+            INSERT INTO reviews (resource_id, reviewer, rating, review_date) VALUES
+                (1, 'alice', 2, '2024-01-01 10:00:00'),
+                (1, 'alice', 5, '2024-03-01 10:00:00'),
+                (1, 'alice', 3, '2024-02-01 10:00:00'),
+                (1, 'bob', 4, '2024-01-05 10:00:00'),
+                (2, 'alice', 1, '2024-01-01 10:00:00');
+        """)
+        conn.close()
+
+    def test_latest_review_per_user_and_resource_is_kept(self):
+        output = subprocess.run([sys.executable, "-c", "import db; db.init_db()"], cwd=self.workdir,
+                                env={**os.environ, "PYTHONPATH": ROOT}, check=True,
+                                capture_output=True, text=True).stdout
+
+        self.assertIn("Removed 2 older duplicate reviews", output)
+        conn = sqlite3.connect(self.db_file)
+        try:
+            rows = conn.execute("SELECT resource_id, reviewer, rating FROM reviews ORDER BY resource_id, reviewer").fetchall()
+            self.assertEqual(rows, [(1, "alice", 5), (1, "bob", 4), (2, "alice", 1)])
+        finally:
+            conn.close()
+        with open(os.path.join(self.workdir, "system.log"), encoding="utf-8") as log:
+            self.assertIn("Removed 2 older review(s) by 'alice' on resource 1", log.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
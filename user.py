@@ -1,11 +1,11 @@
 import logging
 from datetime import datetime
-from db import DB_FILE
+from app_logging import setup_logging
+from db import get_connection
 import sqlite3
 
 # Configure logging
-logging.basicConfig(filename='system.log', level=logging.INFO, 
-                    format='%(asctime)s - %(levelname)s - %(message)s')
+setup_logging()
 
 def collect_user_details():
     """Collect additional user details for registration."""
@@ -28,8 +28,6 @@ def collect_user_details():
 
 def update_user_profile(username, full_name=None, email=None, user_type=None):
     """Update a user's profile information."""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
     try:
         updates = []
         params = []
@@ -49,8 +47,8 @@ def update_user_profile(username, full_name=None, email=None, user_type=None):
         if updates:
             params.append(username)
             query = f"UPDATE users SET {', '.join(updates)} WHERE username = ?"
-            c.execute(query, params)
-            conn.commit()
+            with get_connection(write=True) as conn:
+                conn.execute(query, params)
             print("✅ Profile updated successfully!")
             logging.info(f"Profile updated for user '{username}'")
         else:
@@ -58,7 +56,4 @@ def update_user_profile(username, full_name=None, email=None, user_type=None):
             logging.warning(f"No updates provided for user '{username}'")
     except sqlite3.Error as e:
         print(f"❌ Database error: {e}")
-        logging.error(f"Database error in update_user_profile for '{username}': {e}")
-        conn.rollback()
-    finally:
-        conn.close()
\ No newline at end of file
+        logging.error(f"Database error in update_user_profile for '{username}': {e}")
\ No newline at end of file
@@ -1,30 +1,109 @@
-import uuid
+import base64
+import os
+import sys
+import threading
 import hashlib
 from datetime import datetime
-from db import DB_FILE
-import sqlite3
+from db import queue_write
+from recommender import invalidate_recommendations
+
+# Format of every stored *_date timestamp
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Listings are read from the cursor this many rows at a time
+FETCH_BATCH_SIZE = 200
+
+def write_lines(lines):
+    """Write pre-formatted lines to stdout in one call with a single flush."""
+    sys.stdout.writelines(lines)
+    sys.stdout.flush()
+
+def stream_rows(cursor, formatter, header=None):
+    """Write a query's rows through formatter in fetchmany batches; returns the row count.
+
+    header is written once, before the first batch, and only if there are rows.
+    """
+    count = 0
+    while True:
+        batch = cursor.fetchmany(FETCH_BATCH_SIZE)
+        if not batch:
+            return count
+        if count == 0 and header:
+            write_lines([header])
+        write_lines(formatter(batch))
+        count += len(batch)
+
+# Share links and group codes draw from one os.urandom() buffer, refilled every
+# ENTROPY_POOL_SIZE bytes, rather than making a getrandom() call per token.
+# Both are bearer tokens (a share link opens the resource, a group code admits anyone
+# to a private group), so they must stay unpredictable: do not swap in random.Random,
+# whose output can be reconstructed from a few hundred observed tokens
+ENTROPY_POOL_SIZE = 4096
+_entropy = b""
+_entropy_offset = 0
+_entropy_lock = threading.Lock()
+
+def _random_bytes(n):
+    """Return n bytes from the shared urandom buffer."""
+    global _entropy, _entropy_offset
+    with _entropy_lock:
+        if _entropy_offset + n > len(_entropy):
+            _entropy, _entropy_offset = os.urandom(ENTROPY_POOL_SIZE), 0
+        chunk = _entropy[_entropy_offset:_entropy_offset + n]
+        _entropy_offset += n
+    return chunk
+
+def _reset_entropy():
+    global _entropy, _entropy_offset, _entropy_lock
+    _entropy, _entropy_offset, _entropy_lock = b"", 0, threading.Lock()
+
+# A forked child must not hand out the same bytes as its parent
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_entropy)
 
 def generate_share_link():
-    """Generate a unique shareable link for resources"""
-    return str(uuid.uuid4())[:8]
+    """Generate a unique shareable link for resources (8 hex characters, 32 random bits)"""
+    return _random_bytes(4).hex()
 
 def generate_group_code():
-    """Generate a unique code for study groups"""
-    return str(uuid.uuid4())[:6].upper()
+    """Generate a unique code for study groups (6 base32 characters, A-Z and 2-7)"""
+    return base64.b32encode(_random_bytes(4))[:6].decode("ascii")
+
+# Notification and interaction inserts, reached from several modules. The queued ones
+# are stamped by SQLite in local time, matching the app's other timestamps (the column
+# defaults are UTC); SQL_INSERT_INTERACTION takes the caller's transaction timestamp
+SQL_INSERT_NOTIFICATION = """INSERT INTO notifications (user_id, message, notification_type, created_date, related_id, action_url)
+                             VALUES (?, ?, ?, datetime('now', 'localtime'), ?, ?)"""
+SQL_LOG_INTERACTION = """INSERT INTO user_interactions (user_id, resource_id, interaction_type, interaction_date, interaction_value)
+                         VALUES (?, ?, ?, datetime('now', 'localtime'), ?)"""
+SQL_INSERT_INTERACTION = """INSERT INTO user_interactions (user_id, resource_id, interaction_type, interaction_date, interaction_value)
+                            VALUES (?, ?, ?, ?, ?)"""
+
+# Bound once; now_str() runs on every download, rating and group write
+_now = datetime.now
+
+def now_str():
+    """Current local time formatted for a *_date column."""
+    return _now().strftime(TIMESTAMP_FORMAT)
 
 def create_notification(user_id, message, notification_type, related_id=None, action_url=None):
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute("INSERT INTO notifications (user_id, message, notification_type, created_date, related_id, action_url) VALUES (?, ?, ?, ?, ?, ?)",
-              (user_id, message, notification_type, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), related_id, action_url))
-    conn.commit()
-    conn.close()
+    """Queue a notification for user_id; the background writer commits it with others."""
+    queue_write([(SQL_INSERT_NOTIFICATION, (user_id, message, notification_type, related_id, action_url))])
 
 def log_interaction(user_id, resource_id, interaction_type, value=1):
-    """Log user interactions for recommendation system"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute("INSERT INTO user_interactions (user_id, resource_id, interaction_type, interaction_date, interaction_value) VALUES (?, ?, ?, ?, ?)",
-              (user_id, resource_id, interaction_type, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), value))
-    conn.commit()
-    conn.close()
\ No newline at end of file
+    """Log user interactions for recommendation system
+
+    The row is queued for the background writer, which batches it with other
+    queued writes; recommendations are invalidated once it is committed.
+    Callers that need the row inside their own transaction execute
+    SQL_INSERT_INTERACTION themselves.
+    """
+    log_interactions([(user_id, resource_id, interaction_type, value)])
+
+def log_interactions(rows):
+    """Log several (user_id, resource_id, interaction_type, value) interactions at once.
+
+    The rows are queued as one group, so they are committed in a single
+    transaction and recommendations are invalidated once for all of them.
+    """
+    queue_write([(SQL_LOG_INTERACTION, row) for row in rows], on_commit=invalidate_recommendations)
\ No newline at end of file